@@ -0,0 +1,564 @@
+"""
+benchmark.py
+------------
+Measures the scraper's throughput without spending API quota or
+touching real websites.
+
+A local stand-in server (run in its own process) imitates the two
+Places API endpoints the scraper uses and the job-board APIs of the
+applicant tracking systems it recognizes, and serves thousands of
+synthetic company websites with configurable latency, error rate,
+page size and career-page layout. The scraper is then run against
+it end to end and per-stage timings, requests per second and peak
+memory are reported.
+
+Usage:
+  python benchmark.py                              # 2,000 sites, all profiles
+  python benchmark.py --sites 5000 --latency-ms 80 --error-rate 0.05
+  python benchmark.py --profile 1 --runs 2         # second run is a warm cache
+  python benchmark.py --layouts sitemap=1,path=1   # only those career-page layouts
+  python benchmark.py --output after.json --compare before.json
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import random
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+import config
+
+# Layouts of the synthetic company websites:
+#   link     homepage links to /careers
+#   path     no link; only a CAREER_PATHS entry (/jobs) exists
+#   sitemap  no link; robots.txt → sitemap.xml lists /join-our-team
+#   self     the homepage itself lists the openings (#careers anchor)
+#   none     no career page anywhere
+# and job boards hosted by an applicant tracking system (the openings
+# are only available from the board's JSON API):
+#   greenhouse       /careers embeds the board's JavaScript widget
+#   lever            homepage links straight to the board
+#   ashby            homepage embeds the board in an iframe
+#   smartrecruiters  homepage links straight to the board
+#   workday          /careers links to the board
+LAYOUTS = {
+    "link": 0.35, "path": 0.15, "sitemap": 0.1, "self": 0.05, "none": 0.2,
+    "greenhouse": 0.05, "lever": 0.04, "ashby": 0.02, "smartrecruiters": 0.02, "workday": 0.02,
+}
+ATS_LAYOUTS = ("greenhouse", "lever", "ashby", "smartrecruiters", "workday")
+
+
+def parse_layouts(text):
+    """'link=0.5,none=0.5' → layout weights, for --layouts. Unlisted layouts get 0."""
+    weights = dict.fromkeys(LAYOUTS, 0.0)
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in LAYOUTS:
+            raise argparse.ArgumentTypeError(
+                f"unknown layout '{name}' (choose from {', '.join(LAYOUTS)})")
+        try:
+            weights[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"expected {name}=<weight>, not '{part}'")
+        if weights[name] < 0:
+            raise argparse.ArgumentTypeError(f"{name} has a negative weight")
+    if not any(weights.values()):
+        raise argparse.ArgumentTypeError("at least one layout needs a weight above 0")
+    return weights
+
+FILLER = (
+    "Our team has served the region for over twenty years with a focus on "
+    "quality, safety and long-term customer relationships. "
+)
+
+
+# ─────────────────────────────────────────────
+# SYNTHETIC WORLD
+# ─────────────────────────────────────────────
+
+class World:
+    """Deterministic set of fake companies, their places and websites."""
+
+    def __init__(self, opts):
+        self.opts = opts
+        rng = random.Random(opts["seed"])
+        terms = sorted({t for p in config.PROFILES.values() for t in p["place_searches"]})
+        self.keywords = sorted({k for p in config.PROFILES.values() for k in p["job_keywords"]})
+        layouts = opts.get("layouts", LAYOUTS)
+
+        radius = config.TOTAL_RADIUS_METERS
+        dlat = radius / 111320
+        dlng = radius / (111320 * math.cos(math.radians(config.LAT)))
+        self.places = []
+        for i in range(opts["sites"]):
+            # Half clustered around the center, half spread out
+            if rng.random() < 0.5:
+                lat = config.LAT + rng.gauss(0, dlat / 6)
+                lng = config.LNG + rng.gauss(0, dlng / 6)
+            else:
+                lat = config.LAT + rng.uniform(-dlat, dlat)
+                lng = config.LNG + rng.uniform(-dlng, dlng)
+            self.places.append({
+                "index": i,
+                "id": f"bench{i:06d}",
+                "name": f"Bench Company {i}",
+                "lat": lat,
+                "lng": lng,
+                "terms": set(rng.sample(terms, rng.randint(1, 3))),
+                "website": rng.random() < 0.85,
+                "layout": rng.choices(list(layouts), weights=list(layouts.values()))[0],
+            })
+        self.by_id = {p["id"]: p for p in self.places}
+
+    def search(self, query, rect):
+        low, high = rect["low"], rect["high"]
+        hits = [
+            p for p in self.places
+            if query in p["terms"]
+            and low["latitude"] <= p["lat"] < high["latitude"]
+            and low["longitude"] <= p["lng"] < high["longitude"]
+        ]
+        hits.sort(key=lambda p: hashlib.md5((query + p["id"]).encode()).hexdigest())
+        return hits[:20]
+
+    def openings(self, index):
+        rng = random.Random(f"{self.opts['seed']}-{index}")
+        return rng, rng.sample(self.keywords, rng.randint(0, 3))
+
+    def site_page(self, index, path):
+        """(status, content_type, body) for one synthetic website request."""
+        place = self.places[index]
+        layout = place["layout"]
+        host = f"site{index}.bench.test"
+        rng, openings = self.openings(index)
+
+        if path == "/":
+            links = '<a href="/about">About</a> <a href="/contact">Contact</a>'
+            if layout in ("link", "greenhouse", "workday"):
+                links += ' <a href="/careers">Careers</a>'
+            elif layout == "lever":
+                links += f' <a href="https://jobs.lever.co/site{index}">Careers</a>'
+            elif layout == "smartrecruiters":
+                links += f' <a href="https://careers.smartrecruiters.com/site{index}">Jobs</a>'
+            elif layout == "ashby":
+                links += f'<iframe src="https://jobs.ashbyhq.com/site{index}/embed"></iframe>'
+            body = self.filler(rng) + links
+            if layout == "self":
+                body += '<a href="#careers">Join us</a>' + self.listing(openings)
+            return 200, "text/html", self.html(place["name"], body)
+        if layout == "link" and path == "/careers":
+            return 200, "text/html", self.html("Careers", self.filler(rng) + self.listing(openings))
+        if layout == "greenhouse" and path == "/careers":
+            widget = (
+                '<div id="grnhse_app"></div><script src="https://boards.greenhouse.io/'
+                f'embed/job_board/js?for=site{index}"></script>'
+            )
+            return 200, "text/html", self.html("Careers", self.filler(rng) + widget)
+        if layout == "workday" and path == "/careers":
+            link = f'<a href="https://site{index}.wd1.myworkdayjobs.com/en-US/External">See openings</a>'
+            return 200, "text/html", self.html("Careers", self.filler(rng) + link)
+        if layout == "path" and path == "/jobs":
+            return 200, "text/html", self.html("Jobs", self.filler(rng) + self.listing(openings))
+        if layout == "sitemap":
+            if path == "/robots.txt":
+                return 200, "text/plain", f"User-agent: *\nSitemap: http://{host}/sitemap.xml\n"
+            if path == "/sitemap.xml":
+                locs = "".join(
+                    f"<url><loc>http://{host}{p}</loc></url>"
+                    for p in ("/", "/about", "/join-our-team")
+                )
+                return 200, "application/xml", f"<urlset>{locs}</urlset>"
+            if path == "/join-our-team":
+                return 200, "text/html", self.html("Join", self.filler(rng) + self.listing(openings))
+        return 404, "text/html", "<html><body>Not found</body></html>"
+
+    def board_titles(self, ats, token):
+        """Opening titles on a synthetic job board, or None if there is no such board."""
+        if not token.startswith("site") or not token[4:].isdigit():
+            return None
+        index = int(token[4:])
+        if index >= len(self.places) or self.places[index]["layout"] != ats:
+            return None
+        titles = [title.title() for title in self.openings(index)[1]]
+        # Boards carry unrelated openings too
+        return titles + [f"Warehouse Associate {n}" for n in range(index % 5)]
+
+    def filler(self, rng):
+        target = self.opts["page_kb"] * 1024
+        parts = []
+        size = 0
+        while size < target:
+            chunk = f"<p>{FILLER}{rng.randint(0, 10 ** 6)}</p>"
+            parts.append(chunk)
+            size += len(chunk)
+        return "".join(parts)
+
+    @staticmethod
+    def listing(openings):
+        items = "".join(f"<li>{title.title()}</li>" for title in openings)
+        return f"<h2>Open positions</h2><ul>{items or '<li>No openings right now</li>'}</ul>"
+
+    @staticmethod
+    def html(title, body):
+        return (
+            f"<html><head><title>{title}</title>"
+            f"<script>window.dataLayer = [];</script><style>p {{ margin: 0 }}</style>"
+            f"</head><body>{body}</body></html>"
+        )
+
+
+# ─────────────────────────────────────────────
+# STAND-IN SERVER
+# ─────────────────────────────────────────────
+# One server plays every remote party. The scraper reaches it as
+# the Places API through PLACES_API_BASE, as each job-board API
+# through its <NAME>_API_BASE, and as every company
+# website through HTTP_PROXY: proxied requests arrive with an
+# absolute URL ("GET http://site12.bench.test/careers"), so each
+# synthetic site still looks like its own host to the scraper.
+
+def make_handler(world, stats, lock):
+    opts = world.opts
+
+    class StandIn(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def count(self, kind, sent=0):
+            with lock:
+                stats[kind] = stats.get(kind, 0) + 1
+                stats["bytes"] = stats.get("bytes", 0) + sent
+
+        def reply(self, status, content_type, body, kind, extra_headers=()):
+            data = body.encode() if isinstance(body, str) else body
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in extra_headers:
+                self.send_header(name, value)
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(data)
+            self.count(kind, len(data))
+
+        def places_rate_limited(self):
+            if random.random() < opts["places_429_rate"]:
+                self.reply(429, "application/json", json.dumps({"error": {
+                    "code": 429, "status": "RESOURCE_EXHAUSTED", "message": "Quota exceeded",
+                }}), "places_429")
+                return True
+            return False
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if self.path.startswith("/ats/workday/"):
+                return self.workday_request(request)
+            if not self.path.endswith("/places:searchText"):
+                return self.reply(404, "application/json", "{}", "other")
+            if self.places_rate_limited():
+                return
+            rect = request.get("locationRestriction", {}).get("rectangle")
+            hits = world.search(request.get("textQuery", ""), rect) if rect else []
+            places = [{
+                "id": p["id"],
+                "displayName": {"text": p["name"]},
+                "formattedAddress": f"{p['id']} Bench St",
+            } for p in hits]
+            self.reply(200, "application/json", json.dumps({"places": places}), "places_search")
+
+        def do_GET(self):
+            if self.path == "/__stats":
+                with lock:
+                    body = json.dumps(stats)
+                return self.reply(200, "application/json", body, "stats_probe")
+            if self.path.startswith("http://"):
+                return self.site_request()
+            if self.path.startswith("/ats/"):
+                return self.ats_request()
+            if "/places/" in self.path:
+                if self.places_rate_limited():
+                    return
+                place = world.by_id.get(self.path.rsplit("/", 1)[-1])
+                if not place:
+                    body = {"error": {"code": 404, "status": "NOT_FOUND"}}
+                    return self.reply(404, "application/json", json.dumps(body), "places_details")
+                body = {"nationalPhoneNumber": "(555) 010-0000"}
+                if place["website"]:
+                    body["websiteUri"] = f"http://site{place['index']}.bench.test/"
+                return self.reply(200, "application/json", json.dumps(body), "places_details")
+            self.reply(404, "text/plain", "", "other")
+
+        do_HEAD = do_GET
+
+        def ats_request(self):
+            """Job-board APIs, each at /ats/<name>/ + its real API path."""
+            parts = urlparse(self.path).path.split("/")
+            ats = parts[2]
+            token = {
+                "greenhouse": parts[-2],       # /v1/boards/{token}/jobs
+                "lever": parts[-1],            # /v0/postings/{token}
+                "ashby": parts[-1],            # /posting-api/job-board/{token}
+                "smartrecruiters": parts[-2],  # /v1/companies/{token}/postings
+            }.get(ats, "")
+            titles = world.board_titles(ats, token)
+            if titles is None:
+                return self.reply(404, "application/json", "{}", "ats_other")
+            if ats == "greenhouse":
+                body = {"jobs": [{"title": t, "absolute_url": ""} for t in titles]}
+            elif ats == "lever":
+                body = [{"text": t, "hostedUrl": ""} for t in titles]
+            elif ats == "ashby":
+                body = {"jobs": [{"title": t, "jobUrl": ""} for t in titles]}
+            else:
+                body = {"totalFound": len(titles), "content": [{"name": t} for t in titles]}
+            self.reply(200, "application/json", json.dumps(body), "ats_api")
+
+        def workday_request(self, request):
+            # /ats/workday/wday/cxs/{tenant}/{site}/jobs
+            tenant = self.path.split("/")[-3]
+            titles = world.board_titles("workday", tenant)
+            if titles is None:
+                return self.reply(404, "application/json", "{}", "ats_other")
+            offset, limit = request.get("offset", 0), request.get("limit", 20)
+            body = {
+                "total": len(titles),
+                "jobPostings": [{"title": t} for t in titles[offset:offset + limit]],
+            }
+            self.reply(200, "application/json", json.dumps(body), "ats_api")
+
+        def site_request(self):
+            url = urlparse(self.path)
+            host = url.hostname or ""
+            if opts["latency_ms"]:
+                time.sleep(random.expovariate(1000.0 / opts["latency_ms"]))
+            if not host.startswith("site") or not host.endswith(".bench.test"):
+                return self.reply(404, "text/plain", "", "site_other")
+            if random.random() < opts["error_rate"]:
+                if random.random() < 0.5:
+                    return self.reply(500, "text/html", "<h1>Server error</h1>", "site_error")
+                # Drop the connection without answering
+                self.count("site_dropped")
+                self.close_connection = True
+                self.connection.shutdown(socket.SHUT_RDWR)
+                return
+            index = int(host[4:].split(".")[0])
+            status, content_type, body = world.site_page(index, url.path or "/")
+            etag = '"%s"' % hashlib.md5(body.encode()).hexdigest()
+            if status == 200 and self.headers.get("If-None-Match") == etag:
+                return self.reply(304, content_type, b"", "site_304", [("ETag", etag)])
+            self.reply(status, content_type, body, "site_page", [("ETag", etag)])
+
+    return StandIn
+
+
+def serve(opts, port_queue):
+    """Entry point of the stand-in server process."""
+    world = World(opts)
+    stats = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(world, stats, threading.Lock()))
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+# ─────────────────────────────────────────────
+# HARNESS
+# ─────────────────────────────────────────────
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def parse_workers_peak_rss_mb(scraper):
+    """
+    Summed peak RSS of the parse worker processes, which RUSAGE_SELF
+    doesn't count. 0 when pages are parsed in-thread; None where
+    /proc/<pid>/status isn't available.
+    """
+    pool = scraper._parse_pool
+    if pool is None:
+        return 0.0
+    total_kb = 0
+    for pid in list(pool._processes or {}):
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                total_kb += next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+        except (OSError, StopIteration):
+            return None
+    return total_kb / 1024
+
+
+def fetch_stats(scraper, port):
+    return scraper.requests.get(f"http://127.0.0.1:{port}/__stats", timeout=10).json()
+
+
+def request_total(stats):
+    return sum(v for k, v in stats.items() if k not in ("bytes", "stats_probe"))
+
+
+# Stage of the scraper's pipeline that makes each kind of request
+STAGE_OF_ENDPOINT = {"places_search": "discover", "places_details": "details"}
+
+
+def phase_timings(scraper):
+    """
+    Per-stage figures from the scraper's own metrics. The stages run
+    at the same time, so wall time is when each stage finished,
+    counted from the start of the run.
+    """
+    report = scraper.METRICS.report()
+    phases = {
+        name: {"wall_s": secs, "requests": 0, "bytes": 0}
+        for name, secs in report["phases_s"].items()
+        if name in ("discover", "details", "crawl")
+    }
+    for endpoint, e in report["endpoints"].items():
+        phase = phases.get(STAGE_OF_ENDPOINT.get(endpoint, "crawl"))
+        if phase:
+            phase["requests"] += e["requests"]
+            phase["bytes"] += e["bytes"]
+    return phases
+
+
+def print_report(report, previous=None):
+    print(f"\n{'═' * 65}")
+    print(f"  BENCHMARK — run {report['run']} ({report['sites']} sites, profile {report['profile']})")
+    print(f"{'═' * 65}\n")
+    print(f"  {'Stage':<12}{'Done at (s)':>12}{'Requests':>10}{'Req/s':>10}{'MB in':>10}")
+    rows = list(report["phases"].items()) + [("total", report["total"])]
+    for phase, t in rows:
+        rps = t["requests"] / t["wall_s"] if t["wall_s"] else 0
+        line = (f"  {phase:<12}{t['wall_s']:>12.2f}{t['requests']:>10}"
+                f"{rps:>10.1f}{t['bytes'] / 1e6:>10.1f}")
+        if previous:
+            old = previous["total"] if phase == "total" else previous["phases"].get(phase)
+            if old and old["wall_s"]:
+                line += f"   ({(t['wall_s'] - old['wall_s']) / old['wall_s']:+.0%} wall)"
+        print(line)
+    print(f"\n  Peak RSS        : {report['peak_rss_mb']:.0f} MB")
+    workers = report["parse_workers_peak_rss_mb"]
+    print(f"  Parse workers   : {'n/a' if workers is None else f'{workers:.0f} MB'}")
+    print(f"  Companies found : {report['companies']}")
+    print(f"  Keyword matches : {report['keyword_matches']}")
+    print(f"  Server counters : {report['server']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark for the local job scraper")
+    parser.add_argument("--sites", type=int, default=2000, help="Synthetic companies (default 2000)")
+    parser.add_argument("--profile", default="all", help="Profile key or 'all' (default all)")
+    parser.add_argument("--latency-ms", type=float, default=40, help="Mean website latency")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Website errors/drops (0-1)")
+    parser.add_argument("--places-429-rate", type=float, default=0.01, help="Places 429 rate (0-1)")
+    parser.add_argument("--page-kb", type=int, default=40, help="Filler size per page, in KB")
+    parser.add_argument("--layouts", type=parse_layouts, default=LAYOUTS,
+                        help="Career-page layout mix as name=weight pairs, e.g. "
+                             "link=0.5,sitemap=0.3,workday=0.2 (default: a realistic mix of "
+                             f"all of {', '.join(LAYOUTS)})")
+    parser.add_argument("--domain-delay", type=float, default=None,
+                        help="Override PER_DOMAIN_DELAY (seconds)")
+    parser.add_argument("--parse-processes", type=int, default=None,
+                        help="Override PARSE_PROCESSES (1 = parse on the crawl threads)")
+    parser.add_argument("--runs", type=int, default=1, help="Repeat with the same (warm) cache")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the report(s) to this JSON file")
+    parser.add_argument("--compare", help="Earlier --output file to compare against")
+    args = parser.parse_args()
+
+    opts = {
+        "sites": args.sites,
+        "latency_ms": args.latency_ms,
+        "error_rate": args.error_rate,
+        "places_429_rate": args.places_429_rate,
+        "page_kb": args.page_kb,
+        "layouts": args.layouts,
+        "seed": args.seed,
+    }
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(opts, port_queue), daemon=True)
+    server.start()
+    port = port_queue.get(timeout=60)
+
+    output = os.path.abspath(args.output) if args.output else None
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)[-1]
+
+    # Point the scraper at the stand-in before importing it
+    os.environ.setdefault("GOOGLE_PLACES_API_KEY", "benchmark")
+    os.environ["PLACES_API_BASE"] = f"http://127.0.0.1:{port}/v1"
+    os.environ["GREENHOUSE_API_BASE"] = f"http://127.0.0.1:{port}/ats/greenhouse/v1"
+    os.environ["LEVER_API_BASE"] = f"http://127.0.0.1:{port}/ats/lever/v0"
+    os.environ["ASHBY_API_BASE"] = f"http://127.0.0.1:{port}/ats/ashby"
+    os.environ["SMARTRECRUITERS_API_BASE"] = f"http://127.0.0.1:{port}/ats/smartrecruiters/v1"
+    os.environ["WORKDAY_API_BASE"] = f"http://127.0.0.1:{port}/ats/workday"
+    os.environ["HTTP_PROXY"] = os.environ["http_proxy"] = f"http://127.0.0.1:{port}"
+    os.environ["NO_PROXY"] = os.environ["no_proxy"] = "127.0.0.1,localhost"
+    workdir = tempfile.mkdtemp(prefix="job-scraper-bench-")
+    os.chdir(workdir)
+    import job_scraper as scraper
+
+    if args.domain_delay is not None:
+        scraper.HOST_THROTTLE.delay = args.domain_delay
+    if args.parse_processes is not None:
+        scraper.PARSE_PROCESSES = args.parse_processes
+    scraper.configure_cache(os.path.join(workdir, "cache"))
+    profile_keys = list(config.PROFILES) if args.profile == "all" else [args.profile]
+
+    reports = []
+    for run in range(1, args.runs + 1):
+        before = fetch_stats(scraper, port)
+        start = time.perf_counter()
+        outputs = scraper.run_profiles(profile_keys)
+        wall = time.perf_counter() - start
+        after = fetch_stats(scraper, port)
+        workers_rss = parse_workers_peak_rss_mb(scraper)
+
+        report = {
+            "run": run,
+            "sites": args.sites,
+            "profile": args.profile,
+            "options": opts,
+            "phases": phase_timings(scraper),
+            "total": {
+                "wall_s": round(wall, 3),
+                "requests": request_total(after) - request_total(before),
+                "bytes": after.get("bytes", 0) - before.get("bytes", 0),
+            },
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "parse_workers_peak_rss_mb": None if workers_rss is None else round(workers_rss, 1),
+            "companies": max(o["summary"]["total_companies"] for o in outputs.values()),
+            "keyword_matches": sum(o["summary"]["keyword_matches"] for o in outputs.values()),
+            "server": {k: after.get(k, 0) - before.get(k, 0) for k in after if k != "bytes"},
+        }
+        reports.append(report)
+        print_report(report, previous)
+        if previous is None:
+            previous = report  # Later runs are compared with the first (cold) one
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n  💾 Saved to {output}")
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
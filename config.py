@@ -13,16 +13,28 @@ LNG  = -00.0000                    # Longitude (e.g. -81.9548)
 
 # ── SEARCH RADIUS ────────────────────────────────────────────────
 # How far out to search, in meters.
-# Places API (New) hard cap is 50,000m (~31 miles) per zone.
-# The script runs multiple overlapping zones automatically to cover
-# larger areas — just set your desired total radius below.
+# The search area is split into rectangles automatically. A
+# rectangle is only split into four smaller ones when a search there
+# comes back full (20 results is Google's limit per call), so busy
+# city centers get searched in detail while empty countryside costs
+# a single call.
 #
-#   30 miles  =  48,000m   (within one zone, fast)
-#   60 miles  =  96,000m   (uses 5 zones, ~2x longer to run)
-#  100 miles  = 160,000m   (uses 9 zones, slower but thorough)
+#   30 miles  =  48,000m
+#   60 miles  =  96,000m
+#  100 miles  = 160,000m   (slower, more API calls)
 
 TOTAL_RADIUS_METERS = 96000
 
+# Smallest rectangle the search will split down to, and how many of
+# a full search's 20 results must be new companies before splitting
+# is worth the extra calls (0.25 = at least 5 new). Splitting also
+# stops once a search term has used MAX_SEARCHES_PER_TERM rectangles,
+# which caps what one term can cost (searches served from the cache
+# count too, so every run covers the same rectangles).
+MIN_CELL_METERS        = 3000
+SPLIT_MIN_NEW_FRACTION = 0.25
+MAX_SEARCHES_PER_TERM  = 200
+
 
 # ── JOB PROFILES ─────────────────────────────────────────────────
 # Each profile = a set of company types to search + job keywords
@@ -148,7 +160,8 @@ PROFILES = {
 
 # ── CAREER PAGE URL PATTERNS ──────────────────────────────────────
 # Common paths the scraper will try if it can't find a career link
-# on the homepage. Add more here if you're finding misses.
+# on the homepage or in the site's sitemap. Add more here if you're
+# finding misses. Earlier entries win when several paths exist.
 
 CAREER_PATHS = [
     "/careers", "/careers/", "/jobs", "/jobs/",
@@ -157,4 +170,86 @@ CAREER_PATHS = [
     "/open-positions", "/apply", "/now-hiring",
     "/career-opportunities", "/join", "/work-here",
     "/positions", "/openings",
-]
\ No newline at end of file
+]
+
+
+# ── GOOGLE PLACES RATE LIMIT ─────────────────────────────────────
+# Website/phone lookups (Place Details) run in parallel, paced by a
+# token bucket so the scraper never goes faster than PLACES_QPS.
+# If Google answers "quota exceeded" the lookup backs off and retries.
+
+PLACES_QPS          = 10   # Place Details requests per second
+PLACES_CONCURRENCY  = 8    # Lookups in flight at once
+PLACES_MAX_RETRIES  = 5    # Retries on 429 / RESOURCE_EXHAUSTED
+
+
+# ── CACHE ────────────────────────────────────────────────────────
+# Company websites and phone numbers rarely change, so Place Details
+# answers are remembered between runs and reused until they are
+# older than DETAILS_CACHE_TTL_DAYS. This saves billed API calls.
+# Each website's career page URL is remembered too; sites where no
+# career page was found are not re-probed for NO_CAREERS_TTL_DAYS.
+# Websites that could not be reached are remembered for
+# DEAD_HOST_TTL_DAYS and checked last, giving up on the first error.
+# Google search results are kept per search term and rectangle and
+# reused for up to SEARCH_CACHE_TTL_DAYS (0 turns this off). Entries
+# expire at staggered ages, between (1 - SEARCH_CACHE_SPREAD) and all
+# of the TTL, so a weekly run re-searches a slice of the area each
+# week instead of all of it at once. Rectangles are rounded to
+# SEARCH_CACHE_GRID_METERS, so nudging LAT/LNG still hits the cache.
+# A `plan` for --shard runs reuses its searches and lookups without
+# checking these TTLs, so shards refuse a plan that is older than
+# PLAN_MAX_AGE_HOURS.
+# Override from the command line with --cache-dir, or ignore the
+# cache for one run with --refresh.
+
+CACHE_DIR                = "results/cache"
+DETAILS_CACHE_TTL_DAYS   = 30
+NO_CAREERS_TTL_DAYS      = 14
+DEAD_HOST_TTL_DAYS       = 30
+SEARCH_CACHE_TTL_DAYS    = 28
+SEARCH_CACHE_SPREAD      = 0.5
+SEARCH_CACHE_GRID_METERS = 250
+PLAN_MAX_AGE_HOURS       = 24
+
+
+# ── CRAWL SPEED ──────────────────────────────────────────────────
+# How many company websites to check at the same time, and the
+# minimum pause between two requests to the same website.
+# Higher concurrency finishes sooner; the per-domain delay keeps
+# the scraper polite no matter how many workers are running.
+
+CRAWL_CONCURRENCY = 8      # Company websites checked in parallel
+PER_DOMAIN_DELAY  = 1.0    # Seconds between requests to one domain
+CAREER_PROBE_BATCH = 4     # Path probes / listing pages in flight at once per website
+                           # (each still waits PER_DOMAIN_DELAY for its turn)
+PIPELINE_QUEUE_SIZE = 200  # Companies waiting between stages (bounds memory)
+
+# How pages are read. "fast" streams through the HTML without
+# building a document tree and stops as soon as it has what it
+# needs. "bs4" uses BeautifulSoup — slower, but handy if you ever
+# want to compare results.
+
+HTML_PARSER = "fast"       # "fast" or "bs4"
+
+# Deep crawl (off by default): besides the career page itself, also
+# read the job-listing pages it links to on the same site — further
+# result pages, departments, "view all openings" — up to
+# DEEP_CRAWL_DEPTH links away and DEEP_CRAWL_PAGES pages per company.
+# It stops early once every keyword has been found.
+
+DEEP_CRAWL       = False
+DEEP_CRAWL_DEPTH = 2
+DEEP_CRAWL_PAGES = 10
+
+# Largest page the scraper will download. Anything longer is cut off
+# here; career links and job titles are nearly always near the top.
+
+MAX_PAGE_KB = 2048
+
+# Pages are parsed and matched against keywords in separate worker
+# processes, so parsing uses every CPU core and never holds up the
+# downloads. 0 starts one process per core; 1 parses on the crawl
+# threads instead (no extra processes).
+
+PARSE_PROCESSES = 0
\ No newline at end of file
@@ -10,21 +10,45 @@ Usage:
   Interactive menu:      python job_scraper.py
   Run specific profile:  python job_scraper.py --profile 1
   Run all profiles:      python job_scraper.py --profile all
+  Ignore cached lookups: python job_scraper.py --profile all --refresh
+  Resume after a crash:  python job_scraper.py --profile all --resume
+  Find the slow code:    python job_scraper.py --profile 1 --profile-hotpaths
 
 GitHub Actions runs this automatically on your chosen schedule.
 See .github/workflows/weekly_scraper.yml to change the schedule.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import time
 import json
 import argparse
 import sys
 import os
+import glob
 import math
-from urllib.parse import urljoin, urlparse
-from datetime import datetime
+import multiprocessing
+import cProfile
+import pstats
+import random
+import codecs
+import hashlib
+import re
+import socket
+import sqlite3
+import threading
+import zlib
+import queue
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from collections import OrderedDict, deque
+from urllib.parse import urljoin, urlparse, urldefrag
+from datetime import datetime, timedelta
+from functools import lru_cache
+from html import unescape
+from html.parser import HTMLParser
 
 # Load API key — checks .env file first, then environment variable
 try:
@@ -40,121 +64,1910 @@ if not API_KEY:
     print("   See README.md for instructions.\n")
     sys.exit(1)
 
+# Places API endpoint. Only overridden by benchmark.py, which points
+# the scraper at a local stand-in instead of Google.
+PLACES_API_BASE = os.environ.get("PLACES_API_BASE", "https://places.googleapis.com/v1")
+
+# Public job-board APIs of the applicant tracking systems the scraper
+# recognizes (see APPLICANT TRACKING SYSTEMS), overridable the same way.
+# Workday has no central API host: by default each board's own host is used.
+ATS_API_BASES = {
+    "greenhouse": os.environ.get("GREENHOUSE_API_BASE", "https://boards-api.greenhouse.io/v1"),
+    "lever": os.environ.get("LEVER_API_BASE", "https://api.lever.co/v0"),
+    "ashby": os.environ.get("ASHBY_API_BASE", "https://api.ashbyhq.com"),
+    "smartrecruiters": os.environ.get("SMARTRECRUITERS_API_BASE", "https://api.smartrecruiters.com/v1"),
+    "workday": os.environ.get("WORKDAY_API_BASE", ""),
+}
+
 # Load user config
 from config import (
     LOCATION_LABEL,
     LAT,
     LNG,
     TOTAL_RADIUS_METERS,
+    MIN_CELL_METERS,
+    SPLIT_MIN_NEW_FRACTION,
+    MAX_SEARCHES_PER_TERM,
     PROFILES,
     CAREER_PATHS,
+    PLACES_QPS,
+    PLACES_CONCURRENCY,
+    PLACES_MAX_RETRIES,
+    CACHE_DIR,
+    DETAILS_CACHE_TTL_DAYS,
+    NO_CAREERS_TTL_DAYS,
+    CRAWL_CONCURRENCY,
+    PER_DOMAIN_DELAY,
+    CAREER_PROBE_BATCH,
+    HTML_PARSER,
+    PARSE_PROCESSES,
+    PIPELINE_QUEUE_SIZE,
+    MAX_PAGE_KB,
+    DEAD_HOST_TTL_DAYS,
+    SEARCH_CACHE_TTL_DAYS,
+    SEARCH_CACHE_SPREAD,
+    SEARCH_CACHE_GRID_METERS,
+    PLAN_MAX_AGE_HOURS,
+    DEEP_CRAWL,
+    DEEP_CRAWL_DEPTH,
+    DEEP_CRAWL_PAGES,
+)
+
+# ─────────────────────────────────────────────
+# SEARCH AREA PLANNER
+# ─────────────────────────────────────────────
+# Places searches return at most 20 results, so one big search
+# misses most companies in a busy area. The circle from config.py
+# is covered by coarse rectangles (cells), each searched with a
+# locationRestriction so cells never overlap. A cell is split into
+# four only when a term comes back saturated — all 20 results — and
+# enough of them were new companies to be worth the extra calls.
+# Cells entirely outside the circle are never searched.
+
+MAX_RESULTS = 20              # Places returns at most this many per call
+COARSE_CELL_METERS = 100000   # Side of the starting cells
+METERS_PER_DEG_LAT = 111320
+
+
+def meters_per_deg_lng(lat):
+    return METERS_PER_DEG_LAT * math.cos(math.radians(lat))
+
+
+def make_cell(lat_lo, lng_lo, lat_hi, lng_hi, depth=0):
+    return {"low": [lat_lo, lng_lo], "high": [lat_hi, lng_hi], "depth": depth}
+
+
+def cell_size_m(cell):
+    """Longest side of a cell, in meters."""
+    (lat_lo, lng_lo), (lat_hi, lng_hi) = cell["low"], cell["high"]
+    height = (lat_hi - lat_lo) * METERS_PER_DEG_LAT
+    width = (lng_hi - lng_lo) * meters_per_deg_lng((lat_lo + lat_hi) / 2)
+    return max(height, width)
+
+
+def cell_in_circle(cell, lat, lng, radius):
+    """True if any part of the cell lies within `radius` meters of (lat, lng)."""
+    (lat_lo, lng_lo), (lat_hi, lng_hi) = cell["low"], cell["high"]
+    near_lat = min(max(lat, lat_lo), lat_hi)
+    near_lng = min(max(lng, lng_lo), lng_hi)
+    dy = (near_lat - lat) * METERS_PER_DEG_LAT
+    dx = (near_lng - lng) * meters_per_deg_lng(lat)
+    return math.hypot(dx, dy) <= radius
+
+
+def initial_cells(lat, lng, radius):
+    """Coarse grid over the circle's bounding box, minus corners outside it."""
+    n = max(1, math.ceil(2 * radius / COARSE_CELL_METERS))
+    dlat = radius / METERS_PER_DEG_LAT
+    dlng = radius / meters_per_deg_lng(lat)
+    step_lat, step_lng = 2 * dlat / n, 2 * dlng / n
+    cells = []
+    for i in range(n):
+        for j in range(n):
+            cell = make_cell(
+                lat - dlat + i * step_lat, lng - dlng + j * step_lng,
+                lat - dlat + (i + 1) * step_lat, lng - dlng + (j + 1) * step_lng,
+            )
+            if cell_in_circle(cell, lat, lng, radius):
+                cells.append(cell)
+    return cells
+
+
+def split_cell(cell):
+    """The four quadrants of a cell that still touch the search circle."""
+    (lat_lo, lng_lo), (lat_hi, lng_hi) = cell["low"], cell["high"]
+    lat_mid, lng_mid = (lat_lo + lat_hi) / 2, (lng_lo + lng_hi) / 2
+    depth = cell["depth"] + 1
+    quadrants = [
+        make_cell(lat_lo, lng_lo, lat_mid, lng_mid, depth),
+        make_cell(lat_lo, lng_mid, lat_mid, lng_hi, depth),
+        make_cell(lat_mid, lng_lo, lat_hi, lng_mid, depth),
+        make_cell(lat_mid, lng_mid, lat_hi, lng_hi, depth),
+    ]
+    return [q for q in quadrants if cell_in_circle(q, LAT, LNG, TOTAL_RADIUS_METERS)]
+
+
+SEARCH_CELLS = initial_cells(LAT, LNG, TOTAL_RADIUS_METERS)
+
+
+def search_term_adaptively(term, all_companies, journal, on_found=None, stop=None):
+    """
+    Search one term across the area, splitting saturated cells.
+    New companies are added to `all_companies`. Returns the places in
+    discovery order and a coverage report for this term.
+    Cells already in the run journal are replayed, and cells in the
+    search cache are served from it, not searched again.
+    on_found(term, position, company, is_new) is called for every
+    result as soon as its cell has been searched. Setting the `stop`
+    event ends the search before the next cell. Cells stop splitting
+    once MAX_SEARCHES_PER_TERM cells are searched or queued.
+    """
+    queue = deque(SEARCH_CELLS)
+    places = []
+    cells = []
+    new_total = 0
+    billed = 0
+    failed = 0
+    budget_reached = False
+    while queue and not (stop and stop.is_set()):
+        cell = queue.popleft()
+        key = cell_id(term, cell)
+        results = journal.searches.get(key)
+        cell_failed = False
+        if results is not None:
+            billed += key not in journal.cached_searches
+        else:
+            results = search_cache().get(term, cell)
+            if results is not None:
+                journal.record_search(term, cell, results, cached=True)
+            else:
+                results = search_places(term, cell)
+                time.sleep(0.4)
+                if results is None:
+                    # Neither journaled nor cached, so --resume, the
+                    # shards of a plan and the next run search it again
+                    results, cell_failed = [], True
+                    failed += 1
+                else:
+                    billed += 1
+                    search_cache().put(term, cell, results)
+                    journal.record_search(term, cell, results)
+        new = 0
+        for i, c in enumerate(results):
+            is_new = c["place_id"] not in all_companies
+            if is_new:
+                all_companies[c["place_id"]] = c
+                new += 1
+            if on_found:
+                on_found(term, len(places) + i, all_companies[c["place_id"]], is_new)
+        places += results
+        new_total += new
+
+        split = (
+            len(results) >= MAX_RESULTS
+            and cell_size_m(cell) / 2 >= MIN_CELL_METERS
+            and new >= SPLIT_MIN_NEW_FRACTION * len(results)
+        )
+        if split:
+            quadrants = split_cell(cell)
+            if len(cells) + 1 + len(queue) + len(quadrants) > MAX_SEARCHES_PER_TERM:
+                split, budget_reached = False, True
+            else:
+                queue.extend(quadrants)
+        cells.append({
+            "low": [round(x, 5) for x in cell["low"]],
+            "high": [round(x, 5) for x in cell["high"]],
+            "depth": cell["depth"],
+            "results": len(results),
+            "new": new,
+            "split": split,
+            "failed": cell_failed,
+        })
+
+    return places, {"calls": len(cells), "billed": billed, "failed": failed,
+                    "new_places": new_total, "budget_reached": budget_reached, "cells": cells}
+
+
+# ─────────────────────────────────────────────
+# LOCAL CACHE
+# ─────────────────────────────────────────────
+# A single SQLite file under CACHE_DIR remembers answers between
+# runs. Each cache owns one table; all access goes through a lock
+# so worker threads can share the connection.
+
+CACHE_DB_NAME = "scraper_cache.sqlite3"
+REFRESH_CACHE = False  # Set by --refresh: ignore cached answers this run
+
+
+class SqliteCache:
+    """Thread-safe access to one table in the scraper's cache database."""
+
+    SCHEMA = ""
+
+    def __init__(self, cache_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, CACHE_DB_NAME)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(self.SCHEMA)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _write(self, sql, params=()):
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
+
+
+class PlaceDetailsCache(SqliteCache):
+    """Website/phone per place_id, including places with no website."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS place_details (
+            place_id   TEXT PRIMARY KEY,
+            website    TEXT,
+            phone      TEXT,
+            fetched_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, cache_dir, ttl_days):
+        super().__init__(cache_dir)
+        self.ttl = ttl_days * 86400
+
+    def get(self, place_id):
+        """Return (website, phone) if cached and fresh, else None."""
+        if REFRESH_CACHE:
+            return None
+        row = self._query(
+            "SELECT website, phone, fetched_at FROM place_details WHERE place_id = ?",
+            (place_id,),
+        )
+        if not row or time.time() - row[2] > self.ttl:
+            return None
+        return row[0], row[1]
+
+    def put(self, place_id, website, phone):
+        self._write(
+            "INSERT OR REPLACE INTO place_details VALUES (?, ?, ?, ?)",
+            (place_id, website, phone, time.time()),
+        )
+
+
+class SearchCache(SqliteCache):
+    """
+    Text Search results keyed by normalized query and rounded cell.
+    Each entry expires at its own age within the TTL (see config.py),
+    so refreshes are spread over several runs.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS search_cache (
+            query      TEXT NOT NULL,
+            cell       TEXT NOT NULL,
+            results    TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            PRIMARY KEY (query, cell)
+        );
+    """
+
+    def __init__(self, cache_dir, ttl_days, spread, grid_meters):
+        super().__init__(cache_dir)
+        self.ttl = ttl_days * 86400
+        self.spread = min(max(spread, 0.0), 1.0)
+        self.grid = grid_meters
+
+    def key(self, query, cell):
+        """(query, cell) with case/spacing and sub-grid offsets ignored."""
+        (lat_lo, lng_lo), (lat_hi, lng_hi) = cell["low"], cell["high"]
+        lat_step = self.grid / METERS_PER_DEG_LAT
+        lat = round((lat_lo + lat_hi) / 2 / lat_step)
+        lng_step = self.grid / max(1.0, meters_per_deg_lng(lat * lat_step))
+        rounded = (
+            lat,
+            round((lng_lo + lng_hi) / 2 / lng_step),
+            round((lat_hi - lat_lo) / lat_step),
+            round((lng_hi - lng_lo) / lng_step),
+        )
+        return " ".join(query.lower().split()), "%d,%d,%d,%d" % rounded
+
+    def max_age(self, key):
+        """Seconds this entry stays fresh: the TTL less a stable per-key share."""
+        digest = hashlib.sha1("|".join(key).encode()).digest()
+        share = int.from_bytes(digest[:4], "big") / 2 ** 32
+        return self.ttl * (1 - self.spread * share)
+
+    def get(self, query, cell):
+        """The cached results if fresh, else None."""
+        if REFRESH_CACHE or not self.ttl:
+            return None
+        key = self.key(query, cell)
+        row = self._query(
+            "SELECT results, fetched_at FROM search_cache WHERE query = ? AND cell = ?", key
+        )
+        if not row or time.time() - row[1] > self.max_age(key):
+            return None
+        return json.loads(row[0])
+
+    def put(self, query, cell, results):
+        if not self.ttl:
+            return
+        self._write(
+            "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?)",
+            self.key(query, cell) + (json.dumps(results), time.time()),
+        )
+
+
+class HttpCache(SqliteCache):
+    """
+    Validators (ETag / Last-Modified), a body hash and the results
+    already parsed out of each downloaded page, keyed by URL.
+    `parsed` is a JSON object of {kind: result} so one page can hold
+    e.g. both its career link and its keyword matches.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS http_cache (
+            url           TEXT PRIMARY KEY,
+            etag          TEXT,
+            last_modified TEXT,
+            body_hash     TEXT,
+            parsed        TEXT NOT NULL,
+            fetched_at    REAL NOT NULL
+        );
+    """
+
+    def get(self, url):
+        if REFRESH_CACHE:
+            return None
+        row = self._query(
+            "SELECT etag, last_modified, body_hash, parsed FROM http_cache WHERE url = ?",
+            (url,),
+        )
+        if not row:
+            return None
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "body_hash": row[2],
+            "parsed": json.loads(row[3]),
+        }
+
+    def put(self, url, etag, last_modified, body_hash, parsed):
+        self._write(
+            "INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, body_hash, json.dumps(parsed), time.time()),
+        )
+
+
+class CareerIndex(SqliteCache):
+    """
+    Career page URL discovered for each domain, or NULL when none was
+    found. "None found" entries expire so the site is probed again later.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS career_index (
+            domain     TEXT PRIMARY KEY,
+            career_url TEXT,
+            checked_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, cache_dir, none_ttl_days):
+        super().__init__(cache_dir)
+        self.none_ttl = none_ttl_days * 86400
+
+    def get(self, domain):
+        """
+        Return (career_url,) for a remembered page, (None,) for a fresh
+        "none found" marker, or None if there is nothing usable.
+        """
+        if REFRESH_CACHE:
+            return None
+        row = self._query(
+            "SELECT career_url, checked_at FROM career_index WHERE domain = ?",
+            (domain,),
+        )
+        if not row:
+            return None
+        if row[0] is None and time.time() - row[1] > self.none_ttl:
+            return None
+        return (row[0],)
+
+    def put(self, domain, career_url):
+        self._write(
+            "INSERT OR REPLACE INTO career_index VALUES (?, ?, ?)",
+            (domain, career_url, time.time()),
+        )
+
+
+class HostFailures(SqliteCache):
+    """
+    Hosts that could not be reached in a previous run, with how many
+    runs in a row that happened. Entries expire so a host that comes
+    back is treated normally again.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS host_failures (
+            host        TEXT PRIMARY KEY,
+            failed_runs INTEGER NOT NULL,
+            failed_at   REAL NOT NULL
+        );
+    """
+
+    def __init__(self, cache_dir, ttl_days):
+        super().__init__(cache_dir)
+        self.ttl = ttl_days * 86400
+
+    def get(self, host):
+        """Runs in a row the host was unreachable (0 if none or expired)."""
+        if REFRESH_CACHE:
+            return 0
+        row = self._query(
+            "SELECT failed_runs, failed_at FROM host_failures WHERE host = ?", (host,)
+        )
+        if not row or time.time() - row[1] > self.ttl:
+            return 0
+        return row[0]
+
+    def record(self, host):
+        self._write(
+            "INSERT OR REPLACE INTO host_failures VALUES (?, ?, ?)",
+            (host, self.get(host) + 1, time.time()),
+        )
+
+    def clear(self, host):
+        self._write("DELETE FROM host_failures WHERE host = ?", (host,))
+
+
+_caches = {}
+
+
+def details_cache():
+    """The Place Details cache, opened on first use."""
+    if "details" not in _caches:
+        _caches["details"] = PlaceDetailsCache(CACHE_DIR, DETAILS_CACHE_TTL_DAYS)
+    return _caches["details"]
+
+
+def search_cache():
+    """The Text Search results cache, opened on first use."""
+    if "search" not in _caches:
+        _caches["search"] = SearchCache(CACHE_DIR, SEARCH_CACHE_TTL_DAYS,
+                                        SEARCH_CACHE_SPREAD, SEARCH_CACHE_GRID_METERS)
+    return _caches["search"]
+
+
+def career_index():
+    """The per-domain career URL index, opened on first use."""
+    if "careers" not in _caches:
+        _caches["careers"] = CareerIndex(CACHE_DIR, NO_CAREERS_TTL_DAYS)
+    return _caches["careers"]
+
+
+def http_cache():
+    """The conditional-request page cache, opened on first use."""
+    if "http" not in _caches:
+        _caches["http"] = HttpCache(CACHE_DIR)
+    return _caches["http"]
+
+
+def host_failures():
+    """Hosts that were unreachable in earlier runs, opened on first use."""
+    if "hosts" not in _caches:
+        _caches["hosts"] = HostFailures(CACHE_DIR, DEAD_HOST_TTL_DAYS)
+    return _caches["hosts"]
+
+
+# ─────────────────────────────────────────────
+# CHECKPOINTS
+# ─────────────────────────────────────────────
+# Every finished unit of work — one search cell, one Place Details
+# lookup, one website check — is appended to a journal file as it
+# completes. If a run dies (crash, CI timeout), --resume replays the
+# newest journal for the same profiles and only does what is left.
+# The journal is deleted once the run finishes and results are saved.
+#
+# A sharded run (see SHARDING) and the `plan` command keep their
+# journals under their own names, so --resume never mixes them up
+# with a normal run; a finished plan's journal is kept as the plan
+# the shards start from. A plan's first record stamps it with its run id and
+# date, so shards can tell how old it is and merge can tell whether
+# every shard used the same one.
+
+CHECKPOINT_DIR = os.path.join("results", "checkpoints")
+
+
+def cell_id(term, cell):
+    return "|".join([term] + [f"{x:.6f}" for x in cell["low"] + cell["high"]])
+
+
+class RunJournal:
+    """Append-only JSONL record of completed work for one run."""
+
+    def __init__(self, profile_keys, resume=False, shard=None, plan=False):
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        self.run_key = "-".join(profile_keys)
+        if shard:
+            self.run_key += "-shard-%d-of-%d" % shard
+        if plan:
+            self.run_key += "-plan"
+        self.searches = {}
+        self.cached_searches = set()  # Cells served from the search cache
+        self.details = {}
+        self.sites = {}
+        self.plan = None  # The stamp of a loaded plan
+        self._lock = threading.Lock()
+
+        # Only <run_key>-<YYYYmmdd-HHMMSS>.jsonl, not the journals of
+        # longer run keys that start with this one
+        pattern = f"{self.run_key}-{'[0-9]' * 8}-{'[0-9]' * 6}.jsonl"
+        existing = sorted(glob.glob(os.path.join(CHECKPOINT_DIR, pattern)))
+        if resume and existing:
+            self.path = existing[-1]
+            self.run_id = os.path.basename(self.path)[len(self.run_key) + 1:-len(".jsonl")]
+            self.load(self.path)
+            print(f"  ↩️  Resuming {os.path.basename(self.path)}: "
+                  f"{len(self.searches)} searches, {len(self.details)} lookups, "
+                  f"{len(self.sites)} websites already done")
+        else:
+            if resume:
+                print("  No interrupted run to resume — starting fresh.")
+            self.run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+            self.path = os.path.join(CHECKPOINT_DIR, f"{self.run_key}-{self.run_id}.jsonl")
+        self._file = open(self.path, "a")
+
+    def load(self, path):
+        """Replay the records of a journal file (this run's or a plan)."""
+        with open(path) as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # Half-written last line from the crash
+                if rec["phase"] == "search":
+                    self.searches[rec["cell"]] = rec["results"]
+                    if rec.get("cached"):
+                        self.cached_searches.add(rec["cell"])
+                elif rec["phase"] == "details":
+                    self.details[rec["place_id"]] = (rec["website"], rec["phone"])
+                elif rec["phase"] == "site":
+                    self.sites[rec["site"]] = (rec["career_url"], rec["found"])
+                elif rec["phase"] == "plan":
+                    self.plan = {"run_id": rec["run_id"], "run_date": rec["run_date"]}
+
+    def _append(self, record):
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+    def record_search(self, term, cell, results, cached=False):
+        key = cell_id(term, cell)
+        self.searches[key] = results
+        if cached:
+            self.cached_searches.add(key)
+        self._append({"phase": "search", "cell": key, "results": results, "cached": cached})
+
+    def record_details(self, place_id, website, phone):
+        self.details[place_id] = (website, phone)
+        self._append({"phase": "details", "place_id": place_id,
+                      "website": website, "phone": phone})
+
+    def record_site(self, site, career_url, found):
+        self.sites[site] = (career_url, found)
+        self._append({"phase": "site", "site": site,
+                      "career_url": career_url, "found": found})
+
+    def record_plan(self):
+        """Stamp this run's journal as a plan (see SHARDING)."""
+        started = datetime.strptime(self.run_id, "%Y%m%d-%H%M%S")
+        self.plan = {"run_id": self.run_id, "run_date": started.strftime("%Y-%m-%d %H:%M")}
+        self._append(dict(self.plan, phase="plan"))
+
+    def close(self):
+        self._file.close()
+
+    def finish(self):
+        """The run completed and its results are saved: drop the journal."""
+        self._file.close()
+        os.remove(self.path)
+
+    def keep(self, path):
+        """The run completed: move the journal to `path` instead."""
+        self._file.close()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self.path, path)
+
+
+# ─────────────────────────────────────────────
+# METRICS
+# ─────────────────────────────────────────────
+# Every request is timed and counted by endpoint type, billed Places
+# calls are tallied for cost tracking, and HTML parsing is charged
+# in thread CPU time. The report is saved as results/<name>.metrics.json
+# next to each results file, so runs can be compared afterwards.
+# `merge` combines the reports of a plan and its shards into one.
+# The pipeline stages (discover, details, crawl) overlap, so their
+# phase time is when each finished, counted from the start of the run.
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)  # Seconds
+SLOWEST_DOMAINS = 10
+
+
+class Metrics:
+    """Thread-safe counters, timers and latency histograms for one run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.phases = {}
+            self.endpoints = {}
+            self.hosts = {}
+            self.parse_cpu_s = 0.0
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(name, time.perf_counter() - start)
+
+    def record_phase(self, name, seconds):
+        with self._lock:
+            self.phases[name] = round(seconds, 3)
+
+    def request(self, endpoint, url, seconds, nbytes, status):
+        """Record one HTTP request. `status` is None if it failed outright."""
+        with self._lock:
+            e = self.endpoints.get(endpoint)
+            if e is None:
+                e = self.endpoints[endpoint] = {
+                    "requests": 0, "failed": 0, "billed": 0, "bytes": 0,
+                    "total_s": 0.0, "max_s": 0.0,
+                    "histogram": [0] * (len(LATENCY_BUCKETS) + 1),
+                }
+            e["requests"] += 1
+            e["bytes"] += nbytes
+            e["total_s"] += seconds
+            e["max_s"] = max(e["max_s"], seconds)
+            e["histogram"][sum(1 for b in LATENCY_BUCKETS if seconds > b)] += 1
+            if status is None:
+                e["failed"] += 1
+            elif endpoint.startswith("places_") and status == 200:
+                e["billed"] += 1
+
+            if not endpoint.startswith("places_"):
+                host = urlparse(url).netloc.lower()
+                h = self.hosts.setdefault(host, {"requests": 0, "total_s": 0.0})
+                h["requests"] += 1
+                h["total_s"] += seconds
+
+    @contextmanager
+    def parsing(self):
+        start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add_parse_time(time.thread_time() - start)
+
+    def add_parse_time(self, cpu_s):
+        with self._lock:
+            self.parse_cpu_s += cpu_s
+
+    def report(self):
+        with self._lock:
+            labels = [f"<={b}s" for b in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+            endpoints = {
+                name: dict(
+                    {k: v for k, v in e.items() if k != "histogram"},
+                    total_s=round(e["total_s"], 3),
+                    max_s=round(e["max_s"], 3),
+                    avg_s=round(e["total_s"] / e["requests"], 3) if e["requests"] else 0,
+                    latency_histogram=dict(zip(labels, e["histogram"])),
+                )
+                for name, e in sorted(self.endpoints.items())
+            }
+            slowest = sorted(self.hosts.items(), key=lambda kv: kv[1]["total_s"], reverse=True)
+            return {
+                "phases_s": dict(self.phases),
+                "billed_places_calls": {
+                    name: e["billed"] for name, e in endpoints.items() if name.startswith("places_")
+                },
+                "bytes_downloaded": sum(e["bytes"] for e in endpoints.values()),
+                "parse_cpu_s": round(self.parse_cpu_s, 3),
+                "endpoints": endpoints,
+                "slowest_domains": [
+                    {"host": host, "requests": h["requests"], "total_s": round(h["total_s"], 3)}
+                    for host, h in slowest[:SLOWEST_DOMAINS]
+                ],
+            }
+
+
+METRICS = Metrics()
+
+
+def combine_reports(reports):
+    """
+    One metrics report for a run split into parts (a plan and its
+    shards). Counts and times are added up, except phase times and
+    max_s, which keep the longest: the shards ran side by side.
+    """
+    phases, billed, endpoints, hosts = {}, {}, {}, []
+    for report in reports:
+        for name, secs in report["phases_s"].items():
+            phases[name] = max(phases.get(name, 0), secs)
+        for name, n in report["billed_places_calls"].items():
+            billed[name] = billed.get(name, 0) + n
+        for name, e in report["endpoints"].items():
+            total = endpoints.get(name)
+            if total is None:
+                endpoints[name] = dict(e, latency_histogram=dict(e["latency_histogram"]))
+                continue
+            for k in ("requests", "failed", "billed", "bytes", "total_s"):
+                total[k] += e[k]
+            total["max_s"] = max(total["max_s"], e["max_s"])
+            for label, n in e["latency_histogram"].items():
+                total["latency_histogram"][label] = total["latency_histogram"].get(label, 0) + n
+        hosts += report["slowest_domains"]
+    for e in endpoints.values():
+        e["total_s"] = round(e["total_s"], 3)
+        e["avg_s"] = round(e["total_s"] / e["requests"], 3) if e["requests"] else 0
+    return {
+        "phases_s": phases,
+        "billed_places_calls": billed,
+        "bytes_downloaded": sum(r["bytes_downloaded"] for r in reports),
+        "parse_cpu_s": round(sum(r["parse_cpu_s"] for r in reports), 3),
+        "endpoints": dict(sorted(endpoints.items())),
+        "slowest_domains": sorted(hosts, key=lambda h: h["total_s"], reverse=True)[:SLOWEST_DOMAINS],
+    }
+
+
+# --profile-hotpaths: each worker thread gets its own cProfile
+# profiler (cProfile only sees the thread that enabled it); the
+# main thread's and workers' stats are merged into one dump.
+
+_hotpath_profilers = []
+
+
+def _profile_worker_thread():
+    if not _hotpath_profilers:
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return  # Python 3.12+ allows one active profiler: main thread only
+    _hotpath_profilers.append(profiler)
+
+
+def worker_pool(max_workers):
+    """ThreadPoolExecutor whose threads join --profile-hotpaths when it is on."""
+    return ThreadPoolExecutor(max_workers=max(1, max_workers), initializer=_profile_worker_thread)
+
+
+def start_hotpath_profile():
+    profiler = cProfile.Profile()
+    _hotpath_profilers.append(profiler)
+    profiler.enable()
+
+
+HOTPATHS_FILE = "results/hotpaths.prof"
+
+
+def save_hotpath_profile(path):
+    main_profiler = _hotpath_profilers[0]
+    main_profiler.disable()
+    stats = pstats.Stats(main_profiler)
+    for profiler in _hotpath_profilers[1:]:
+        stats.add(profiler)
+    stats.dump_stats(path)
+    print(f"\n  🔥 Hot paths (cumulative time) — full profile in {path}\n")
+    stats.sort_stats("cumulative").print_stats(15)
+
+
+# ─────────────────────────────────────────────
+# HTTP CLIENT
+# ─────────────────────────────────────────────
+# Every request goes through one of two shared sessions, so TCP/TLS
+# connections are kept alive and reused — including for the many
+# CAREER_PATHS probes sent to the same host. Headers, timeouts and
+# retry policy live here and nowhere else.
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+PLACES_TIMEOUT = 10   # Places API calls
+PROBE_TIMEOUT  = 8    # Homepages and career URL probes
+PAGE_TIMEOUT   = 10   # Career pages being scanned for keywords
+
+# Website bodies are streamed and cut off at MAX_PAGE_KB, so a career
+# link that turns out to be an endless page costs a bounded amount of
+# memory and bandwidth. Pages that should be HTML are refused unread
+# when the server says they are something else (a PDF, a video...).
+MAX_PAGE_BYTES = MAX_PAGE_KB * 1024
+DOWNLOAD_CHUNK = 16 * 1024
+PAGE_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+
+class UnwantedContent(requests.RequestException):
+    """A page's Content-Type is not one the caller can use."""
+
+
+def make_session(headers, pool_hosts, pool_size, retries):
+    """
+    A requests.Session with a connection pool per host.
+    `retries` only covers connection failures; HTTP statuses are left
+    to the caller (Places has its own backoff, pages are just skipped).
+    """
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(
+        pool_connections=pool_hosts,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=retries, read=0, status=0, redirect=5,
+                          backoff_factor=0.3, raise_on_status=False),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+PLACES_SESSION = make_session(
+    {"X-Goog-Api-Key": API_KEY},
+    pool_hosts=1, pool_size=max(PLACES_CONCURRENCY, 1), retries=0,
+)
+WEB_SESSION = make_session(
+    {"User-Agent": USER_AGENT},
+    pool_hosts=max(CRAWL_CONCURRENCY, 1) * 4,
+    pool_size=max(CAREER_PROBE_BATCH, 4), retries=1,
+)
+
+
+class PageMemo:
+    """
+    The last few successful page responses of this run, keyed by URL
+    without its #fragment. When a homepage link points back at the
+    homepage, the response already downloaded is reused.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            return self._pages.get(urldefrag(url)[0])
+
+    def put(self, url, resp):
+        with self._lock:
+            self._pages[urldefrag(url)[0]] = resp
+            while len(self._pages) > self.size:
+                self._pages.popitem(last=False)
+
+
+RECENT_PAGES = PageMemo(max(CRAWL_CONCURRENCY, 1) * 2)
+
+
+def read_body(resp, accept=None, limit=MAX_PAGE_BYTES):
+    """
+    Download a streamed response's body, keeping at most `limit` bytes,
+    and release the connection. If a 200 or 206 response's Content-Type
+    is not in `accept`, raises UnwantedContent without reading the body.
+    """
+    with resp:
+        content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if accept and resp.status_code in (200, 206) and content_type and content_type not in accept:
+            raise UnwantedContent(f"{content_type} at {resp.url}")
+        body = bytearray()
+        for chunk in resp.iter_content(min(DOWNLOAD_CHUNK, limit)):
+            body += chunk
+            if len(body) >= limit:
+                del body[limit:]
+                break  # Closing mid-body drops the connection instead of reading on
+        resp._content = bytes(body)
+        resp._content_consumed = True
+    return resp
+
+
+# ─────────────────────────────────────────────
+# GOOGLE PLACES API (New)
+# ─────────────────────────────────────────────
+
+def search_places(query, cell):
+    """
+    Search Places API (New) for businesses inside one search cell.
+    Returns None if the search failed.
+    """
+    url = f"{PLACES_API_BASE}/places:searchText"
+    headers = {
+        "X-Goog-FieldMask": "places.id,places.displayName,places.formattedAddress",
+    }
+    body = {
+        "textQuery": query,
+        "locationRestriction": {
+            "rectangle": {
+                "low": {"latitude": cell["low"][0], "longitude": cell["low"][1]},
+                "high": {"latitude": cell["high"][0], "longitude": cell["high"][1]},
+            }
+        },
+        "maxResultCount": MAX_RESULTS,
+    }
+    companies = []
+    try:
+        start = time.perf_counter()
+        try:
+            response = PLACES_SESSION.post(url, headers=headers, json=body, timeout=PLACES_TIMEOUT)
+        except Exception:
+            METRICS.request("places_search", url, time.perf_counter() - start, 0, None)
+            raise
+        METRICS.request("places_search", url, time.perf_counter() - start,
+                        len(response.content), response.status_code)
+        data = response.json()
+        if "error" in data:
+            err = data["error"]
+            print(f"    ⚠️  API Error {err.get('code')}: {err.get('message')}")
+            return None
+        for place in data.get("places", []):
+            companies.append({
+                "name": place.get("displayName", {}).get("text", "Unknown"),
+                "address": place.get("formattedAddress", ""),
+                "place_id": place.get("id"),
+                "website": None,
+            })
+    except Exception as e:
+        print(f"    ⚠️  Request failed: {e}")
+        return None
+    return companies
+
+
+# Place Details calls are paced by a token bucket rather than a
+# fixed sleep: up to PLACES_QPS requests per second, shared by all
+# worker threads. Quota errors back off exponentially with jitter.
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` acquisitions per second."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+PLACES_LIMITER = TokenBucket(PLACES_QPS)
+
+
+class PlacesAPIError(Exception):
+    """A Places request that was refused or still failed after all retries."""
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Exponential backoff with full jitter, capped at 30s (Retry-After too)."""
+    if retry_after:
+        try:
+            return min(30.0, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(30.0, 0.5 * (2 ** attempt)))
+
+
+def get_place_website(place_id):
+    """
+    Get website and phone from Place Details (New API).
+    Retries rate-limit and server errors. Only NOT_FOUND counts as "no
+    website"; any other error (bad key, billing, bad request) or a
+    lookup that never succeeds raises PlacesAPIError, so callers can
+    report it instead of caching it as a company without a website.
+    """
+    url = f"{PLACES_API_BASE}/places/{place_id}"
+    headers = {"X-Goog-FieldMask": "websiteUri,nationalPhoneNumber"}
+    last_error = None
+    retry_after = None
+    for attempt in range(PLACES_MAX_RETRIES + 1):
+        if attempt:
+            time.sleep(backoff_delay(attempt, retry_after))
+            retry_after = None
+        PLACES_LIMITER.acquire()
+        start = time.perf_counter()
+        try:
+            response = PLACES_SESSION.get(url, headers=headers, timeout=PLACES_TIMEOUT)
+        except Exception as e:
+            METRICS.request("places_details", url, time.perf_counter() - start, 0, None)
+            last_error = str(e)
+            continue
+        METRICS.request("places_details", url, time.perf_counter() - start,
+                        len(response.content), response.status_code)
+        try:
+            data = response.json()
+        except Exception as e:
+            last_error = str(e)
+            continue
+
+        err = data.get("error") if isinstance(data, dict) else None
+        if response.status_code == 429 or response.status_code >= 500 or (
+            err and err.get("status") == "RESOURCE_EXHAUSTED"
+        ):
+            last_error = f"{response.status_code} {(err or {}).get('status', '')}".strip()
+            retry_after = response.headers.get("Retry-After")
+            continue
+        if response.status_code == 404 or (err and err.get("status") == "NOT_FOUND"):
+            return None, None  # The place is gone
+        if err or response.status_code >= 400:
+            err = err or {}
+            raise PlacesAPIError(f"{place_id}: {response.status_code} {err.get('status', '')} "
+                                 f"{err.get('message', '')}".strip())
+        return data.get("websiteUri"), data.get("nationalPhoneNumber")
+
+    raise PlacesAPIError(f"{place_id}: {last_error}")
+
+
+def place_details(company, journal):
+    """
+    (website, phone) for one place, served from the run journal or the
+    local cache when possible, otherwise looked up and recorded in both.
+    Returns ((website, phone), from_cache). Raises PlacesAPIError.
+    """
+    place_id = company["place_id"]
+    cached = journal.details.get(place_id) or details_cache().get(place_id)
+    if cached is not None:
+        return tuple(cached), True
+    website, phone = get_place_website(place_id)
+    details_cache().put(place_id, website, phone)
+    journal.record_details(place_id, website, phone)
+    return (website, phone), False
+
+
+# ─────────────────────────────────────────────
+# HOST HEALTH
+# ─────────────────────────────────────────────
+# A dead website used to cost the homepage request, the sitemap and
+# every CAREER_PATHS probe, each waiting out its own timeout. Now
+# each host gets a circuit breaker: after HOST_FAILURE_LIMIT
+# connection errors or timeouts in a row (or one DNS answer that the
+# name doesn't exist) it is "open" and every further request to that
+# host fails at once with HostUnavailable. Hosts that were already unreachable last
+# run get a limit of 1, and their first failure is remembered again
+# in the cache (see HostFailures).
+#
+# Once per run, each host name is checked to exist before any request
+# is sent, so a dead domain costs one DNS lookup instead of a timeout
+# per request. The answer is only a yes/no; requests still resolves
+# the name itself when it connects. Only "no such name" counts: a
+# temporary resolver failure (EAI_AGAIN) lets the request go ahead.
+# Hosts reached through a proxy are not checked locally.
+
+HOST_FAILURE_LIMIT = 2
+NETWORK_ERRORS = (requests.ConnectionError, requests.Timeout)
+# getaddrinfo errors that mean the name doesn't exist (EAI_NODATA is
+# not defined on every platform)
+MISSING_NAME_ERRORS = {
+    code for code in (socket.EAI_NONAME, getattr(socket, "EAI_NODATA", None)) if code is not None
+}
+
+
+class HostUnavailable(requests.ConnectionError):
+    """The host's circuit breaker is open for the rest of the run."""
+
+
+class HostHealth:
+    """Per-host circuit breakers plus a once-per-run check that each host name exists."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._open = set()
+        self._name_exists = {}
+        self._known_bad = {}
+
+    @staticmethod
+    def host(url):
+        return urlparse(url).netloc.lower()
+
+    def known_bad(self, url):
+        """True if the host was unreachable in a recent run."""
+        host = self.host(url)
+        with self._lock:
+            if host in self._known_bad:
+                return self._known_bad[host]
+        bad = host_failures().get(host) > 0
+        with self._lock:
+            return self._known_bad.setdefault(host, bad)
+
+    def is_open(self, url):
+        return self.host(url) in self._open
+
+    def check(self, url):
+        """Raise HostUnavailable if requests to this host should not be sent."""
+        host = self.host(url)
+        if host in self._open:
+            raise HostUnavailable(f"{host} is unreachable (circuit open)")
+        if not self._name_exists_for(url):
+            self._trip(host)
+            raise HostUnavailable(f"{host} does not exist")
+
+    def _name_exists_for(self, url):
+        """False only if DNS says the host name doesn't exist."""
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        with self._lock:
+            if host in self._name_exists:
+                return self._name_exists[host]
+        if requests.utils.get_environ_proxies(url):
+            exists = True
+        else:
+            try:
+                socket.getaddrinfo(parsed.hostname, parsed.port or 443, type=socket.SOCK_STREAM)
+                exists = True
+            except socket.gaierror as e:
+                exists = e.errno not in MISSING_NAME_ERRORS
+            except UnicodeError:
+                exists = False  # Not a valid host name at all
+            except OSError:
+                exists = True  # Not a DNS answer: let the request find out
+        with self._lock:
+            self._name_exists[host] = exists
+        return exists
+
+    def succeeded(self, url):
+        host = self.host(url)
+        was_bad = self.known_bad(url)
+        with self._lock:
+            self._failures.pop(host, None)
+            self._known_bad[host] = False
+        if was_bad:
+            host_failures().clear(host)
+
+    def failed(self, url):
+        host = self.host(url)
+        limit = 1 if self.known_bad(url) else HOST_FAILURE_LIMIT
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            trip = self._failures[host] >= limit and host not in self._open
+        if trip:
+            self._trip(host)
+
+    def _trip(self, host):
+        with self._lock:
+            if host in self._open:
+                return
+            self._open.add(host)
+        host_failures().record(host)
+
+
+HOST_HEALTH = HostHealth()
+
+
+# ─────────────────────────────────────────────
+# PER-DOMAIN POLITENESS
+# ─────────────────────────────────────────────
+# The career-page check stage works on many companies at once, but
+# each individual website still only sees one request every
+# PER_DOMAIN_DELAY seconds. Workers reserve the next free slot for
+# a host and sleep until it arrives, so slow or busy hosts never
+# block requests to other hosts.
+
+class HostThrottle:
+    """Spaces out requests to the same host by at least `delay` seconds."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
+
+
+HOST_THROTTLE = HostThrottle(PER_DOMAIN_DELAY)
+
+
+def polite_get(url, endpoint="page", accept=None, **kwargs):
+    """
+    GET through the shared web session, honouring the per-domain delay.
+    `endpoint` names the kind of request in the metrics report; the body
+    is read with read_body(resp, accept, limit).
+    """
+    return polite_request("GET", url, endpoint, accept, **kwargs)
+
+
+def polite_request(method, url, endpoint="page", accept=None, limit=MAX_PAGE_BYTES, **kwargs):
+    """Like polite_get, for any HTTP method."""
+    HOST_HEALTH.check(url)
+    HOST_THROTTLE.wait(url)
+    start = time.perf_counter()
+    try:
+        resp = read_body(WEB_SESSION.request(method, url, stream=True, **kwargs), accept, limit)
+    except Exception as e:
+        METRICS.request(endpoint, url, time.perf_counter() - start, 0, None)
+        if isinstance(e, NETWORK_ERRORS):
+            HOST_HEALTH.failed(url)
+        raise
+    HOST_HEALTH.succeeded(url)
+    METRICS.request(endpoint, url, time.perf_counter() - start, len(resp.content), resp.status_code)
+    return resp
+
+
+# ─────────────────────────────────────────────
+# CONDITIONAL REQUESTS
+# ─────────────────────────────────────────────
+# Most career pages don't change from one week to the next. Pages
+# are re-requested with If-None-Match / If-Modified-Since, and a
+# 304 (or a 200 whose body hashes the same as last time) reuses the
+# result parsed on the previous run instead of parsing it again.
+
+# Metrics endpoint name for each kind of parsed fetch
+REQUEST_KINDS = {
+    "career_link": "homepage",
+    "career_ok": "remembered_career_page",
+    "sitemaps": "robots_txt",
+    "sitemap_scan": "sitemap",
+    "keywords": "career_page",
+    "ats": "page",
+    "ats_titles": "ats_api",
+    "listing": "listing_page",
+}
+
+
+# Kinds that parse a web page, so anything but HTML or text is refused
+HTML_KINDS = {"career_link", "career_ok", "keywords", "ats", "listing"}
+
+
+def fetch_parsed(url, kind, parse, timeout=PAGE_TIMEOUT):
+    """
+    GET `url` and return parse(resp), reusing the cached result for
+    `kind` when the server says the page is unchanged.
+    Only 200 responses are cached; other statuses are parsed as-is.
+    """
+    cache = http_cache()
+    entry = cache.get(url)
+    resp = RECENT_PAGES.get(url)
+    if resp is None:
+        headers = {}
+        if entry and kind in entry["parsed"]:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        endpoint = REQUEST_KINDS.get(kind.split(":")[0], "page")
+        accept = PAGE_TYPES if kind.split(":")[0] in HTML_KINDS else None
+        resp = polite_get(url, endpoint, accept, headers=headers, timeout=timeout)
+        if resp.status_code == 304 and entry and kind in entry["parsed"]:
+            return entry["parsed"][kind]
+        if resp.status_code == 304:
+            resp = polite_get(url, endpoint, accept, timeout=timeout)
+        if resp.status_code != 200:
+            with METRICS.parsing():
+                return parse(resp)
+        RECENT_PAGES.put(url, resp)
+
+    body_hash = hashlib.sha256(resp.content).hexdigest()
+    if entry and entry["body_hash"] == body_hash:
+        parsed = entry["parsed"]
+        if kind in parsed:
+            result = parsed[kind]
+        else:
+            with METRICS.parsing():
+                result = parsed[kind] = parse(resp)
+    else:
+        with METRICS.parsing():
+            parsed = {kind: parse(resp)}
+        result = parsed[kind]
+
+    cache.put(
+        url,
+        resp.headers.get("ETag"),
+        resp.headers.get("Last-Modified"),
+        body_hash,
+        parsed,
+    )
+    return result
+
+
+# ─────────────────────────────────────────────
+# KEYWORD MATCHING
+# ─────────────────────────────────────────────
+# Matches must start and end on a word boundary: "sales manager"
+# matches "Sales Manager" but not "presales manager", and any run of
+# whitespace between words counts as one space. Plain substring tests
+# (is every word of the keyword in the text?) are fast, so they pick
+# the few keywords that can be on the page at all, and only those
+# are searched for as whole words. Each keyword is searched on its
+# own, so overlapping keywords ("outside sales" in "outside sales
+# representative") are all found. Its regex starts with the keyword's
+# first word, which lets re skip ahead to each occurrence; the word
+# boundary before it is then checked by hand, as a lookbehind would
+# make re try every position.
+
+WORD_CHAR = re.compile(r"\w")
+
+def normalize_keyword(keyword):
+    return " ".join(keyword.lower().split())
+
+
+class KeywordMatcher:
+    """Finds every profile's job keywords in a single pass over page text."""
+
+    def __init__(self, keyword_sets):
+        self.keyword_sets = {key: list(kws) for key, kws in keyword_sets.items()}
+        # Hashable form, for rebuilding the matcher in a parse worker
+        self.items = tuple((key, tuple(kws)) for key, kws in self.keyword_sets.items())
+        unique = []
+        for keywords in self.keyword_sets.values():
+            for kw in keywords:
+                norm = normalize_keyword(kw)
+                if norm and norm not in unique:
+                    unique.append(norm)
+
+        self.signature = hashlib.sha1("\n".join(sorted(unique)).encode()).hexdigest()[:12]
+        self._all = set(unique)
+        self._patterns = {
+            kw: (kw.split(), re.compile(r"\s+".join(map(re.escape, kw.split())) + r"(?!\w)"))
+            for kw in unique
+        }
+
+    def find(self, text):
+        """Set of normalized keywords present anywhere in `text`."""
+        text = text.lower()
+        return {
+            kw for kw, (words, pattern) in self._patterns.items()
+            if all(word in text for word in words) and self._whole_word_in(pattern, text)
+        }
+
+    @staticmethod
+    def _whole_word_in(pattern, text):
+        m = pattern.search(text)
+        while m:
+            start = m.start()
+            if start == 0 or not WORD_CHAR.match(text, start - 1):
+                return True
+            m = pattern.search(text, start + 1)
+        return False
+
+    def all_found(self, found):
+        """True once a set from find() holds every keyword."""
+        return self._all <= found
+
+    def split(self, found):
+        """Turn a set from find() into {profile_key: [keywords]} in config order."""
+        return {
+            key: [kw for kw in keywords if normalize_keyword(kw) in found]
+            for key, keywords in self.keyword_sets.items()
+        }
+
+
+@lru_cache(maxsize=32)
+def _matcher_for(items):
+    return KeywordMatcher(dict(items))
+
+
+# ─────────────────────────────────────────────
+# HTML EXTRACTION
+# ─────────────────────────────────────────────
+# Only two things are ever read from a page: career-looking links
+# and the visible text. The "fast" path streams the HTML through the
+# standard library's HTMLParser, skips <script>/<style>/<template>
+# content and never builds a document tree. Link scanning stops at
+# the first match. The "bs4" path is kept for comparison and gives
+# the same results.
+
+CAREER_LINK_WORDS = ["career", "job", "hiring", "employment", "join", "apply", "work-with"]
+SKIPPED_TAGS = {"script", "style", "template"}
+SCAN_CHUNK = 64 * 1024
+# Links to files rather than pages ("apply.pdf") are never career pages
+SKIPPED_LINK_EXTENSIONS = (
+    ".pdf", ".doc", ".docx", ".zip", ".jpg", ".jpeg", ".png", ".gif", ".mp4", ".mov", ".mp3",
 )
 
+
+class _StopScan(Exception):
+    pass
+
+
+class PageScanner(HTMLParser):
+    """
+    Streaming extractor for visible text and (optionally) the first
+    <a href> that passes `link_filter`. Stops early once the link is
+    found if `want_text` is False. With collect_links=True, every
+    (href, link text) pair is kept in `links`.
+    """
+
+    def __init__(self, want_text=True, link_filter=None, collect_links=False):
+        super().__init__(convert_charrefs=True)
+        self.want_text = want_text
+        self.link_filter = link_filter
+        self.link = None
+        self.links = [] if collect_links else None
+        self.parts = []
+        self._anchor = None  # [href, text parts] inside a collected <a>
+        self._skip_depth = 0
+        self._in_text = False  # data split across feed() chunks is rejoined
+
+    def handle_starttag(self, tag, attrs):
+        self._in_text = False
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if self.links is not None and href:
+                self._anchor = [href, []]
+            if self.link_filter and self.link is None:
+                if href is not None and self.link_filter(href):
+                    self.link = href
+                    if not self.want_text:
+                        raise _StopScan()
+
+    def handle_endtag(self, tag):
+        self._in_text = False
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "a" and self._anchor is not None:
+            href, text = self._anchor
+            self.links.append((href, " ".join("".join(text).split())))
+            self._anchor = None
+
+    def handle_comment(self, data):
+        self._in_text = False
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._anchor is not None:
+            self._anchor[1].append(data)
+        if not self.want_text:
+            return
+        if self._in_text:
+            self.parts[-1] += data
+        else:
+            self.parts.append(data)
+            self._in_text = True
+
+    def unknown_decl(self, data):
+        self._in_text = False
+        if data.startswith("CDATA["):
+            self.handle_data(data[6:])
+            self._in_text = False
+
+    def scan(self, html):
+        try:
+            for chunk in html_chunks(html):
+                self.feed(chunk)
+            self.close()
+        except _StopScan:
+            pass
+        return self
+
+    @property
+    def text(self):
+        return " ".join(self.parts)
+
+
+def html_chunks(html):
+    """A page as SCAN_CHUNK-sized strings; `html` is a string or already chunks."""
+    if isinstance(html, str):
+        return (html[i:i + SCAN_CHUNK] for i in range(0, len(html), SCAN_CHUNK))
+    return html
+
+
+def is_career_href(href):
+    href = href.lower()
+    if urlparse(href).path.endswith(SKIPPED_LINK_EXTENSIONS):
+        return False
+    return any(w in href for w in CAREER_LINK_WORDS)
+
+
+def career_link(html, page_url):
+    """First link on a page that looks like it leads to a careers page."""
+    if HTML_PARSER == "bs4":
+        soup = BeautifulSoup("".join(html_chunks(html)), "html.parser")
+        for a in soup.find_all("a", href=True):
+            if is_career_href(a["href"]):
+                return urljoin(page_url, a["href"])
+        return None
+
+    href = PageScanner(want_text=False, link_filter=is_career_href).scan(html).link
+    return urljoin(page_url, href) if href is not None else None
+
+
+def page_text(html):
+    """Visible text of a page, lowercased."""
+    if HTML_PARSER == "bs4":
+        soup = BeautifulSoup("".join(html_chunks(html)), "html.parser")
+        return soup.get_text(separator=" ").lower()
+    return PageScanner().scan(html).text.lower()
+
+
+def html_keywords(html, matcher_items):
+    """Sorted keywords on a page, for a matcher given by its .items."""
+    return sorted(_matcher_for(matcher_items).find(page_text(html)))
+
+
+# Links followed by the deep crawl (see CAREER PAGE SCRAPER): same
+# site, and the URL or link text looks like part of a job listing.
+LISTING_LINK_WORDS = [
+    "job", "career", "opening", "position", "vacanc", "opportunit", "requisition",
+    "department", "page=", "/page/", "offset=", "view all", "see all", "next",
+]
+
+
+def is_listing_link(url, text):
+    target = (url + " " + text).lower()
+    return any(w in target for w in LISTING_LINK_WORDS)
+
+
+def listing_page(html, page_url, matcher_items):
+    """
+    {"keywords": [...], "links": [...]} for one page of a job listing:
+    keywords as in html_keywords, and the same-site listing links on it.
+    """
+    if HTML_PARSER == "bs4":
+        soup = BeautifulSoup("".join(html_chunks(html)), "html.parser")
+        anchors = [(a["href"], " ".join(a.get_text(" ").split()))
+                   for a in soup.find_all("a", href=True)]
+        text = soup.get_text(separator=" ").lower()
+    else:
+        scanner = PageScanner(collect_links=True).scan(html)
+        anchors, text = scanner.links, scanner.text.lower()
+
+    site = site_key(page_url)
+    links = []
+    for href, link_text in anchors:
+        url = urldefrag(urljoin(page_url, href))[0]
+        parsed = urlparse(url)
+        if (
+            parsed.scheme in ("http", "https")
+            and site_key(url) == site
+            and not parsed.path.lower().endswith(SKIPPED_LINK_EXTENSIONS)
+            and is_listing_link(url, link_text)
+            and url not in links
+        ):
+            links.append(url)
+    return {"keywords": sorted(_matcher_for(matcher_items).find(text)), "links": links}
+
+
+# ─────────────────────────────────────────────
+# PARSE POOL
+# ─────────────────────────────────────────────
+# Parsing a page is CPU work, and in a thread it holds the GIL and
+# stalls every download in progress. Crawl threads instead hand the
+# raw response bytes to a pool of worker processes and wait on the
+# result, leaving the GIL free for the other threads' network I/O.
+# Parse functions must be module-level so they can be pickled.
+#
+# Workers are spawned rather than forked: the crawl is multi-threaded,
+# and forking a process while another thread holds a lock can hang it.
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def parse_pool():
+    """The shared parse process pool, or None when parsing in-thread."""
+    global _parse_pool
+    workers = PARSE_PROCESSES or os.cpu_count() or 1
+    if workers <= 1:
+        return None
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _parse_pool
+
+
+def decode_chunks(content, encoding):
+    """
+    Decode a page SCAN_CHUNK bytes at a time, so a scanner that stops
+    early never decodes the rest and no second full copy is made.
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    view = memoryview(content)
+    for i in range(0, len(view), SCAN_CHUNK):
+        yield decoder.decode(view[i:i + SCAN_CHUNK])
+    yield decoder.decode(b"", final=True)
+
+
+def _parse_in_worker(func, content, encoding, args):
+    start = time.thread_time()
+    result = func(decode_chunks(content, encoding), *args)
+    return result, time.thread_time() - start
+
+
+def parse_page(func, resp, *args):
+    """
+    func(html, *args) for a downloaded page, run in the parse pool.
+    `html` is handed over as decoded chunks (see html_chunks).
+    Blocks only the calling thread.
+    """
+    pool = parse_pool()
+    if pool is None:
+        return func(decode_chunks(resp.content, resp.encoding), *args)
+    result, cpu_s = pool.submit(
+        _parse_in_worker, func, resp.content, resp.encoding, args
+    ).result()
+    METRICS.add_parse_time(cpu_s)
+    return result
+
+
 # ─────────────────────────────────────────────
-# BUILD SEARCH ZONES
+# CAREER PAGE DISCOVERY
 # ─────────────────────────────────────────────
-# Places API (New) caps radius at 50,000m per search.
-# We automatically generate overlapping circles to cover
-# the full radius the user specified in config.py.
+# When the homepage has no career link, the site's own sitemap is
+# the next cheapest place to look: robots.txt names the sitemaps
+# (falling back to /sitemap.xml), and sitemap indexes are followed
+# for a few files. Only then are CAREER_PATHS probed with ranged
+# GETs, CAREER_PROBE_BATCH in flight at once. Each probe still waits
+# for its own PER_DOMAIN_DELAY slot, so a batch only overlaps the time
+# spent waiting on the server, never the pause between requests.
+# The first path (in CAREER_PATHS order) of the first batch with a
+# hit wins, so results don't depend on which response came back first.
+
+CAREER_SEGMENTS = {p.strip("/").lower() for p in CAREER_PATHS}
+SITEMAP_MAX_FILES = 4      # Sitemap files read per site
+PROBE_BYTES = 2048         # Bytes requested from each probed path
+LOC_RE = re.compile(r"<loc>\s*(.*?)\s*</loc>", re.IGNORECASE | re.DOTALL)
 
-ZONE_RADIUS = 50000  # Max per API call
+PROBE_POOL = worker_pool(max(CRAWL_CONCURRENCY, 1) * max(CAREER_PROBE_BATCH, 1))
 
-def build_search_centers(lat, lng, total_radius_meters):
-    """Generate overlapping search centers to cover the full radius."""
-    centers = [{"lat": lat, "lng": lng, "label": f"{LOCATION_LABEL} (center)"}]
 
-    if total_radius_meters <= ZONE_RADIUS:
-        return centers
+def is_career_path(url):
+    """True if any path segment of `url` looks like a careers page."""
+    segments = [seg for seg in urlparse(url).path.lower().split("/") if seg]
+    return any(
+        seg in CAREER_SEGMENTS or seg.startswith(("career", "job"))
+        for seg in segments
+    )
 
-    # Offset distance between center and surrounding zones
-    offset_m = total_radius_meters * 0.55
-    offset_deg_lat = offset_m / 111320
-    offset_deg_lng = offset_m / (111320 * math.cos(math.radians(lat)))
 
-    directions = [
-        ("north", offset_deg_lat, 0),
-        ("south", -offset_deg_lat, 0),
-        ("east",  0,  offset_deg_lng),
-        ("west",  0, -offset_deg_lng),
+def parse_robots(resp):
+    """Sitemap URLs listed in a robots.txt response."""
+    if resp.status_code != 200:
+        return []
+    return [
+        line.split(":", 1)[1].strip()
+        for line in resp.text.splitlines()
+        if line.lower().startswith("sitemap:")
     ]
 
-    if total_radius_meters > ZONE_RADIUS * 2:
-        directions += [
-            ("northeast",  offset_deg_lat * 0.7,  offset_deg_lng * 0.7),
-            ("northwest",  offset_deg_lat * 0.7, -offset_deg_lng * 0.7),
-            ("southeast", -offset_deg_lat * 0.7,  offset_deg_lng * 0.7),
-            ("southwest", -offset_deg_lat * 0.7, -offset_deg_lng * 0.7),
-        ]
-
-    for direction, dlat, dlng in directions:
-        centers.append({
-            "lat": lat + dlat,
-            "lng": lng + dlng,
-            "label": f"{LOCATION_LABEL} ({direction})",
-        })
-
-    return centers
 
-SEARCH_CENTERS = build_search_centers(LAT, LNG, TOTAL_RADIUS_METERS)
+def parse_sitemap(resp, site):
+    """
+    Read a sitemap (plain or gzipped). Returns {"career": url or None,
+    "children": [...]}; children are only set for sitemap indexes.
+    """
+    if resp.status_code != 200:
+        return {"career": None, "children": []}
+    body = resp.content
+    if body[:2] == b"\x1f\x8b":
+        # Capped like any download; a cut-off stream still yields what came through
+        try:
+            body = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body, MAX_PAGE_BYTES)
+        except zlib.error:
+            return {"career": None, "children": []}
+    text = body.decode("utf-8", "replace")
+    locs = [unescape(loc) for loc in LOC_RE.findall(text)]
+    if "<sitemapindex" in text[:2000].lower():
+        return {"career": None, "children": locs}
 
+    careers = [loc for loc in locs if site_key(loc) == site and is_career_path(loc)]
+    if not careers:
+        return {"career": None, "children": []}
+    return {"career": min(careers, key=lambda u: (len(urlparse(u).path), u)), "children": []}
 
-# ─────────────────────────────────────────────
-# GOOGLE PLACES API (New)
-# ─────────────────────────────────────────────
 
-def search_places(query, lat, lng):
-    """Search Places API (New) for businesses near given coordinates."""
-    url = "https://places.googleapis.com/v1/places:searchText"
-    headers = {
-        "Content-Type": "application/json",
-        "X-Goog-Api-Key": API_KEY,
-        "X-Goog-FieldMask": "places.id,places.displayName,places.formattedAddress",
-    }
-    body = {
-        "textQuery": query,
-        "locationBias": {
-            "circle": {
-                "center": {"latitude": lat, "longitude": lng},
-                "radius": float(ZONE_RADIUS),
-            }
-        },
-        "maxResultCount": 20,
-    }
-    companies = []
+def sitemap_career_url(base):
+    """Career page listed in the site's sitemap(s), or None."""
+    site = site_key(base)
     try:
-        response = requests.post(url, headers=headers, json=body, timeout=10)
-        data = response.json()
-        if "error" in data:
-            err = data["error"]
-            print(f"    ⚠️  API Error {err.get('code')}: {err.get('message')}")
-            return companies
-        for place in data.get("places", []):
-            companies.append({
-                "name": place.get("displayName", {}).get("text", "Unknown"),
-                "address": place.get("formattedAddress", ""),
-                "place_id": place.get("id"),
-                "website": None,
-            })
-    except Exception as e:
-        print(f"    ⚠️  Request failed: {e}")
-    return companies
+        queue = fetch_parsed(base + "/robots.txt", "sitemaps", parse_robots,
+                             timeout=PROBE_TIMEOUT)
+    except Exception:
+        queue = []
+    queue = list(queue) or [base + "/sitemap.xml"]
+
+    seen = set()
+    while queue and len(seen) < SITEMAP_MAX_FILES:
+        url = queue.pop(0)
+        if url in seen:
+            continue
+        seen.add(url)
+        try:
+            found = fetch_parsed(url, "sitemap_scan",
+                                 lambda resp: parse_sitemap(resp, site),
+                                 timeout=PROBE_TIMEOUT)
+        except Exception:
+            continue
+        if found["career"]:
+            return found["career"]
+        # Page/career sitemaps first; product and blog sitemaps are rarely useful
+        queue += sorted(
+            found["children"],
+            key=lambda u: not any(w in u.lower() for w in ("career", "job", "page")),
+        )
+    return None
 
 
-def get_place_website(place_id):
-    """Get website and phone from Place Details (New API)."""
-    url = f"https://places.googleapis.com/v1/places/{place_id}"
-    headers = {
-        "X-Goog-Api-Key": API_KEY,
-        "X-Goog-FieldMask": "websiteUri,nationalPhoneNumber",
-    }
+def probe_path(url):
+    """Ranged GET: True if the path exists and is a page with real content."""
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        data = response.json()
-        if "error" in data:
-            return None, None
-        return data.get("websiteUri"), data.get("nationalPhoneNumber")
+        resp = polite_get(
+            url, "career_probe", PAGE_TYPES, limit=PROBE_BYTES,
+            headers={"Range": f"bytes=0-{PROBE_BYTES - 1}"},
+            timeout=PROBE_TIMEOUT,
+        )
     except Exception:
-        return None, None
+        return False
+    return resp.status_code in (200, 206) and len(resp.content) > 500
+
+
+def probe_career_paths(base):
+    """First CAREER_PATHS entry that exists on the site, or None."""
+    batch_size = max(CAREER_PROBE_BATCH, 1)
+    for i in range(0, len(CAREER_PATHS), batch_size):
+        if HOST_HEALTH.is_open(base):
+            return None
+        batch = [base + path for path in CAREER_PATHS[i:i + batch_size]]
+        for url, ok in zip(batch, PROBE_POOL.map(probe_path, batch)):
+            if ok:
+                return url
+    return None
+
+
+# ─────────────────────────────────────────────
+# APPLICANT TRACKING SYSTEMS
+# ─────────────────────────────────────────────
+# Many companies don't host their own job listings: the careers page
+# embeds a Greenhouse, Lever, Ashby, SmartRecruiters or Workday board
+# in an iframe or loads it with JavaScript, so the HTML the scraper
+# downloads has no openings in it. Those boards all have a public
+# JSON API, so once a board is spotted in a link, iframe or script
+# URL its job titles are fetched in one small request instead.
+
+# (ats, pattern) — groups are the board's identifiers in its URLs
+ATS_PATTERNS = [
+    ("greenhouse", re.compile(
+        r"(?:boards|job-boards)\.greenhouse\.io/(?:embed/job_board(?:/js)?\?for=)?([\w-]+)", re.I)),
+    ("lever", re.compile(r"jobs\.lever\.co/([\w.-]+)", re.I)),
+    ("ashby", re.compile(r"jobs\.ashbyhq\.com/([\w.-]+)", re.I)),
+    ("smartrecruiters", re.compile(r"(?:jobs|careers)\.smartrecruiters\.com/([\w-]+)", re.I)),
+    ("workday", re.compile(
+        r"(?<![\w-])([\w-]{1,63})\.(wd\d+)\.myworkdayjobs\.com/(?:[a-z]{2}-[A-Z]{2}/)?([\w-]+)")),
+]
+# Path segments that match the patterns above but are not board names
+ATS_NON_BOARDS = {"embed", "js", "v0", "v1", "wday", "api"}
+
+WORKDAY_PAGE_SIZE = 20  # The most Workday returns per request
+ATS_MAX_PAGES = 10
+
+
+def ats_board_url(text):
+    """
+    Canonical board URL for the first job board referenced in `text`
+    (a URL or a whole HTML page), or None.
+    """
+    text = "".join(html_chunks(text))
+    for ats, pattern in ATS_PATTERNS:
+        for m in pattern.finditer(text):
+            ids = m.groups()
+            if ids[-1].lower() in ATS_NON_BOARDS:
+                continue
+            if ats == "greenhouse":
+                return f"https://boards.greenhouse.io/{ids[0]}"
+            if ats == "lever":
+                return f"https://jobs.lever.co/{ids[0]}"
+            if ats == "ashby":
+                return f"https://jobs.ashbyhq.com/{ids[0]}"
+            if ats == "smartrecruiters":
+                return f"https://jobs.smartrecruiters.com/{ids[0]}"
+            tenant, dc, site = ids
+            return f"https://{tenant.lower()}.{dc.lower()}.myworkdayjobs.com/{site}"
+    return None
+
+
+def ats_of(board_url):
+    """(ats, ids) for a canonical board URL from ats_board_url."""
+    for ats, pattern in ATS_PATTERNS:
+        m = pattern.search(board_url)
+        if m:
+            return ats, m.groups()
+    return None, ()
+
+
+def ats_job_titles(board_url):
+    """
+    Titles of every opening on a job board. GET APIs go through
+    fetch_parsed, so an unchanged board costs a 304 on the next run.
+    Raises if the board can't be read.
+    """
+    ats, ids = ats_of(board_url)
+    base = ATS_API_BASES[ats]
+
+    if ats == "workday":
+        return workday_job_titles(*ids)
+    if ats == "greenhouse":
+        api_url, field = f"{base}/boards/{ids[0]}/jobs", ("jobs", "title")
+    elif ats == "lever":
+        api_url, field = f"{base}/postings/{ids[0]}?mode=json", (None, "text")
+    elif ats == "ashby":
+        api_url, field = f"{base}/posting-api/job-board/{ids[0]}", ("jobs", "title")
+    else:
+        api_url, field = f"{base}/companies/{ids[0]}/postings?limit=100", ("content", "name")
+
+    def titles(resp):
+        resp.raise_for_status()
+        data = resp.json()
+        postings = data[field[0]] if field[0] else data
+        return [p.get(field[1]) or "" for p in postings]
+
+    return fetch_parsed(api_url, "ats_titles", titles, timeout=PAGE_TIMEOUT)
+
+
+def workday_job_titles(tenant, dc, site):
+    """Workday's job search is a paged POST, so it is not cached."""
+    base = ATS_API_BASES["workday"] or f"https://{tenant.lower()}.{dc.lower()}.myworkdayjobs.com"
+    api_url = f"{base}/wday/cxs/{tenant.lower()}/{site}/jobs"
+    titles = []
+    for page in range(ATS_MAX_PAGES):
+        resp = polite_request("POST", api_url, "ats_api", timeout=PAGE_TIMEOUT, json={
+            "appliedFacets": {},
+            "limit": WORKDAY_PAGE_SIZE,
+            "offset": page * WORKDAY_PAGE_SIZE,
+            "searchText": "",
+        })
+        resp.raise_for_status()
+        data = resp.json()
+        postings = data.get("jobPostings") or []
+        titles.extend(p.get("title") or "" for p in postings)
+        if len(postings) < WORKDAY_PAGE_SIZE or len(titles) >= (data.get("total") or 0):
+            break
+    return titles
+
+
+def board_keywords(board_url, matcher):
+    """Keywords in a job board's opening titles, as {profile_key: [keywords]}."""
+    # Separate titles so a keyword can't span two of them
+    return matcher.split(matcher.find(" | ".join(ats_job_titles(board_url))))
+
+
+def page_board_url(url):
+    """Job board a page links to or embeds, or None. Reuses the fetched page."""
+    return fetch_parsed(url, "ats", lambda resp: parse_page(ats_board_url, resp), timeout=PAGE_TIMEOUT)
 
 
 # ─────────────────────────────────────────────
@@ -162,135 +1975,920 @@ def get_place_website(place_id):
 # ─────────────────────────────────────────────
 
 def find_career_page(website_url):
-    """Check homepage for career links, then try common URL patterns."""
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        )
-    }
+    """
+    Return the career page URL for a website, or None.
+    A URL remembered from a previous run is tried first. Otherwise the
+    homepage is scanned for a job board or career link, then the sitemap,
+    then common URL patterns — unless a recent run already found nothing
+    here.
+    """
     base = f"{urlparse(website_url).scheme}://{urlparse(website_url).netloc}"
+    domain = site_key(website_url)
+    index = career_index()
+    remembered = index.get(domain)
+
+    if remembered and remembered[0]:
+        if ats_board_url(remembered[0]):
+            return remembered[0]  # Checked through the board's API instead
+        try:
+            ok = fetch_parsed(
+                remembered[0], "career_ok",
+                lambda resp: resp.status_code == 200,
+                timeout=PROBE_TIMEOUT,
+            )
+            if ok:
+                return remembered[0]
+        except Exception:
+            pass
 
+    homepage_ok = False
     try:
-        resp = requests.get(website_url, headers=headers, timeout=8)
-        soup = BeautifulSoup(resp.text, "html.parser")
-        for a in soup.find_all("a", href=True):
-            href = a["href"].lower()
-            if any(w in href for w in ["career", "job", "hiring", "employment", "join", "apply", "work-with"]):
-                return urljoin(website_url, a["href"])
+        link = fetch_parsed(
+            website_url, "career_link",
+            lambda resp: parse_page(career_link, resp, website_url),
+            timeout=PROBE_TIMEOUT,
+        )
+        homepage_ok = True
+        board = page_board_url(website_url)
+        if board or link:
+            index.put(domain, board or link)
+            return board or link
     except Exception:
         pass
 
-    for path in CAREER_PATHS:
-        try:
-            url = base + path
-            resp = requests.get(url, headers=headers, timeout=8)
-            if resp.status_code == 200 and len(resp.text) > 500:
-                return url
-        except Exception:
-            continue
+    if remembered and remembered[0] is None:
+        return None
+    if HOST_HEALTH.is_open(website_url):
+        return None  # Site is down: don't wait out the sitemap and probes too
+
+    url = sitemap_career_url(base) or probe_career_paths(base)
+    if url:
+        index.put(domain, url)
+        return url
 
+    # Only remember "no career page" if the site itself was reachable
+    if homepage_ok:
+        index.put(domain, None)
     return None
 
 
-def check_for_keywords(career_url, keywords):
-    """Scrape career page and return any matching job keywords."""
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        )
-    }
+def page_keywords(url, matcher):
+    """
+    Keywords found on a page, as {profile_key: [keywords]}. The matches
+    are cached per keyword set, so an unchanged page is not parsed
+    again on the next run.
+    """
+    found = fetch_parsed(
+        url, f"keywords:{matcher.signature}",
+        lambda resp: parse_page(html_keywords, resp, matcher.items),
+        timeout=PAGE_TIMEOUT,
+    )
+    return matcher.split(set(found))
+
+
+def listing_page_at(url, matcher):
+    """listing_page() for one URL, cached like page_keywords."""
+    return fetch_parsed(
+        url, f"listing:{matcher.signature}",
+        lambda resp: parse_page(listing_page, resp, url, matcher.items),
+        timeout=PAGE_TIMEOUT,
+    )
+
+
+def _try_listing_page(url, matcher):
     try:
-        resp = requests.get(career_url, headers=headers, timeout=10)
-        soup = BeautifulSoup(resp.text, "html.parser")
-        text = soup.get_text(separator=" ").lower()
-        return [kw for kw in keywords if kw in text]
+        return listing_page_at(url, matcher)
     except Exception:
-        return []
+        return None
+
+
+def deep_crawl_keywords(career_url, matcher):
+    """
+    Keywords found on a career page plus the listing pages it links to
+    (pagination, departments, "view all openings"), as a set from
+    KeywordMatcher.find. Follows same-site listing links breadth-first
+    up to DEEP_CRAWL_DEPTH links away, fetching at most DEEP_CRAWL_PAGES
+    pages, CAREER_PROBE_BATCH at a time. Stops as soon as every keyword
+    has been found. Errors on the career page itself are raised.
+    """
+    root = listing_page_at(career_url, matcher)
+    found = set(root["keywords"])
+    seen = {urldefrag(career_url)[0]}
+    frontier = deque((url, 1) for url in root["links"])
+    pages = 1
+    batch_size = max(CAREER_PROBE_BATCH, 1)
+
+    while frontier and pages < DEEP_CRAWL_PAGES and not matcher.all_found(found):
+        if HOST_HEALTH.is_open(career_url):
+            break
+        batch = []
+        while frontier and len(batch) < min(batch_size, DEEP_CRAWL_PAGES - pages):
+            url, depth = frontier.popleft()
+            if url not in seen:
+                seen.add(url)
+                batch.append((url, depth))
+        results = PROBE_POOL.map(lambda item: _try_listing_page(item[0], matcher), batch)
+        for (url, depth), page in zip(batch, results):
+            pages += 1
+            if page is None:
+                continue
+            found.update(page["keywords"])
+            if depth < DEEP_CRAWL_DEPTH:
+                frontier.extend((link, depth + 1) for link in page["links"] if link not in seen)
+    return found
+
+
+def site_key(website_url):
+    """Domain used to deduplicate companies that share one website."""
+    netloc = urlparse(website_url).netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def check_site(website_url, matcher):
+    """
+    Find a site's career page, download it once and match it against
+    every profile's keywords. If it is (or embeds) a known job board,
+    the board's job titles are matched instead. With DEEP_CRAWL on,
+    listing pages linked from the career page are read too.
+    Returns (career_url, {profile_key: keywords_found}).
+    """
+    career_url = find_career_page(website_url)
+    if not career_url:
+        return None, {}
+    try:
+        board = ats_board_url(career_url) or page_board_url(career_url)
+    except Exception:
+        board = None
+    if board:
+        try:
+            found = board_keywords(board, matcher)
+            if board != career_url:
+                career_index().put(site_key(website_url), board)
+            return board, found
+        except Exception:
+            pass  # Fall back to reading the page itself
+    try:
+        if DEEP_CRAWL:
+            return career_url, matcher.split(deep_crawl_keywords(career_url, matcher))
+        return career_url, page_keywords(career_url, matcher)
+    except Exception:
+        return career_url, {}
+
+
+def site_progress(name, career_url, found, matcher):
+    """Progress lines printed when a website has been checked."""
+    lines = [f"  Checked: {name}"]
+    matched = {p: kws for p, kws in found.items() if kws}
+    if not career_url:
+        lines.append("    ❌ No career page")
+    elif matched:
+        for p, kws in matched.items():
+            tag = f" [{p}]" if len(matcher.keyword_sets) > 1 else ""
+            lines.append(f"    🎯 MATCH{tag}: {', '.join(kws)}")
+        lines.append(f"       → {career_url}")
+    else:
+        lines.append("    📄 Has careers page (no keyword match)")
+    return "\n".join(lines)
+
+
+# ─────────────────────────────────────────────
+# RESULT WRITERS
+# ─────────────────────────────────────────────
+# "json" (the default) collects a profile's results and writes one
+# indented file at the end, companies in discovery order.
+# "jsonl" writes each company as its own line the moment its website
+# has been checked, then a summary line once the profile is done —
+# memory stays flat and the file can be tailed during a run.
+#
+# A company can be added again when a later search finds it at an
+# earlier position; "json" keeps its earliest order, "jsonl" (which
+# has already written it) ignores the repeat.
+#
+# A sharded run writes to results/shards/ instead, and its "json"
+# files keep each company's order so `merge` can restore it.
+
+BUCKETS = ("keyword_matches", "has_careers_page", "no_careers_page")
+
+
+class JsonResultWriter:
+    """Buffers a profile's results and saves them as one JSON document."""
+
+    extension = ".json"
+
+    def __init__(self, profile_key, shard=None):
+        self.path = result_path(profile_key, self.extension, shard)
+        self.shard = shard
+        self._rows = {bucket: {} for bucket in BUCKETS}
+
+    def add(self, bucket, company, order):
+        rows = self._rows[bucket]
+        current = rows.get(company["place_id"])
+        if current is None or order < current[0]:
+            rows[company["place_id"]] = (order, company)
+
+    def finish(self, header):
+        output = dict(header)
+        output["summary"] = dict(header["summary"], **{
+            bucket: len(rows) for bucket, rows in self._rows.items()
+        })
+        for bucket in BUCKETS:
+            rows = sorted(self._rows[bucket].values(), key=lambda r: r[0])
+            if self.shard:
+                output[bucket] = [dict(c, order=order) for order, c in rows]
+            else:
+                output[bucket] = [c for _order, c in rows]
+        with open(self.path, "w") as f:
+            json.dump(output, f, indent=2)
+        return output
+
+    @staticmethod
+    def read(path):
+        """(header, [(bucket, company, order), ...]) of a shard file."""
+        with open(path) as f:
+            output = json.load(f)
+        rows = []
+        for bucket in BUCKETS:
+            for company in output.pop(bucket):
+                order = tuple(company.pop("order"))
+                rows.append((bucket, company, order))
+        return output, rows
+
+
+class JsonlResultWriter:
+    """Streams one line per company as soon as it is classified."""
+
+    extension = ".jsonl"
+
+    def __init__(self, profile_key, shard=None):
+        self.path = result_path(profile_key, self.extension, shard)
+        self.counts = dict.fromkeys(BUCKETS, 0)
+        self._written = set()
+        self._file = open(self.path, "w")
+
+    def add(self, bucket, company, order):
+        if company["place_id"] in self._written:
+            return
+        self._written.add(company["place_id"])
+        self.counts[bucket] += 1
+        self._file.write(json.dumps(dict(company, type="company", bucket=bucket)) + "\n")
+        self._file.flush()
+
+    def finish(self, header):
+        output = dict(header)
+        output["summary"] = dict(header["summary"], **self.counts)
+        self._file.write(json.dumps(dict(output, type="summary")) + "\n")
+        self._file.close()
+        return output
+
+    @staticmethod
+    def read(path):
+        """
+        (header, [(bucket, company, None), ...]) of a shard file. The
+        header is None if the shard never wrote its summary line.
+        """
+        header, rows = None, []
+        with open(path) as f:
+            for line in f:
+                record = json.loads(line)
+                if record.pop("type") == "summary":
+                    header = record
+                else:
+                    rows.append((record.pop("bucket"), record, None))
+        return header, rows
+
+
+RESULT_WRITERS = {"json": JsonResultWriter, "jsonl": JsonlResultWriter}
+
+
+def result_path(profile_key, extension, shard=None):
+    folder = SHARD_DIR if shard else "results"
+    os.makedirs(folder, exist_ok=True)
+    stem = os.path.splitext(PROFILES[profile_key]["output_file"])[0]
+    if shard:
+        stem += ".shard-%d-of-%d" % shard
+    return os.path.join(folder, stem + extension)
+
+
+# ─────────────────────────────────────────────
+# SHARDING
+# ─────────────────────────────────────────────
+# A big search can be split across machines or CI matrix jobs:
+#
+#   job_scraper.py plan --profile all             searches + lookups, once
+#   job_scraper.py --profile all --shard 1/4      ...one per shard, 1/4 to 4/4
+#   job_scraper.py merge --profile all            results/<name>.json
+#
+# `plan` runs every search and Place Details lookup and keeps its run
+# journal in results/shards/. Each shard replays that journal, so no
+# Places call is billed twice, then checks only the websites whose
+# domain hashes to its slice. Every shard knows the full company
+# list, so the summary totals are the same in each shard file and
+# `merge` only has to add up the buckets. Without a plan each shard
+# runs the searches and lookups itself.
+#
+# A plan skips the cache TTLs, so shards refuse one older than
+# PLAN_MAX_AGE_HOURS. Each shard file names the plan it used, and
+# `merge` refuses shards from different plans. It also combines the
+# plan's and shards' metrics into results/<name>.metrics.json.
+
+SHARD_DIR = os.path.join("results", "shards")
+SHARD_FILE = re.compile(r"\.shard-(\d+)-of-(\d+)\.\w+$")
+
+
+def parse_shard(text):
+    """'2/4' → (2, 4), for --shard."""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected I/N, like 1/4, not '{text}'")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {index} of {count} doesn't exist")
+    return index, count
+
+
+def shard_of(site, count):
+    """Shard (1 to count) that checks `site`; the same on every machine."""
+    digest = hashlib.sha1(site.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def plan_path(profile_keys, extension=".jsonl"):
+    return os.path.join(SHARD_DIR, "plan-%s%s" % ("-".join(profile_keys), extension))
+
+
+def check_plan(path):
+    """
+    Raise ValueError unless the plan at `path` is stamped and at most
+    PLAN_MAX_AGE_HOURS old.
+    """
+    with open(path) as f:
+        try:
+            stamp = json.loads(f.readline())
+        except ValueError:
+            stamp = {}
+    if stamp.get("phase") != "plan":
+        raise ValueError(f"{path} has no run date (it was made by an older version); "
+                         "run `plan` again")
+    age = datetime.now() - datetime.strptime(stamp["run_id"], "%Y%m%d-%H%M%S")
+    if age > timedelta(hours=PLAN_MAX_AGE_HOURS):
+        raise ValueError(f"{path} is from {stamp['run_date']}, more than "
+                         f"{PLAN_MAX_AGE_HOURS} hours ago; run `plan` again")
+
+
+def merge_shards(profile_key, output_format="json", plan_report=None):
+    """
+    Combine a profile's shard files into results/<name>.json (or .jsonl),
+    and their metrics reports (plus `plan_report`, if given) into
+    results/<name>.metrics.json.
+    Returns (output, path). Raises ValueError if a shard is missing,
+    unfinished, or from a different plan.
+    """
+    writer_class = RESULT_WRITERS[output_format]
+    stem = os.path.splitext(PROFILES[profile_key]["output_file"])[0]
+    splits = {}  # shard count → {index: path}
+    for path in glob.glob(os.path.join(SHARD_DIR, f"{stem}.shard-*{writer_class.extension}")):
+        m = SHARD_FILE.search(path)
+        if m:  # Not <name>.shard-I-of-N.metrics.json
+            splits.setdefault(int(m.group(2)), {})[int(m.group(1))] = path
+    if not splits:
+        raise ValueError(f"no {writer_class.extension} shard files for {stem} in {SHARD_DIR}")
+    if len(splits) > 1:
+        raise ValueError(f"{stem} has shard files from runs split {sorted(splits)} ways; "
+                         "remove the old ones")
+    count, paths = splits.popitem()
+    missing = sorted(set(range(1, count + 1)) - set(paths))
+    if missing:
+        raise ValueError(f"{stem} is missing shard {', '.join(map(str, missing))} of {count}")
+
+    writer = writer_class(profile_key)
+    header = None
+    for index in sorted(paths):
+        shard_header, rows = writer_class.read(paths[index])
+        if shard_header is None:
+            raise ValueError(f"{paths[index]} is unfinished (its run was interrupted)")
+        totals = {k: shard_header["summary"][k] for k in ("total_companies", "with_websites")}
+        plan = shard_header.get("shard", {}).get("plan")
+        if header is None:
+            header = dict(shard_header, summary=totals)
+            header.pop("shard", None)
+            first_plan = plan
+        elif plan != first_plan:
+            raise ValueError(f"{paths[index]} used a different plan than shard 1 "
+                             f"({plan or 'none'}, not {first_plan or 'none'})")
+        elif totals != header["summary"]:
+            raise ValueError(f"{paths[index]} found different companies than shard 1; "
+                             "run every shard from the same plan")
+        for bucket, company, order in rows:
+            writer.add(bucket, company, order)
+
+    reports = [plan_report] if plan_report else []
+    for index in sorted(paths):
+        path = os.path.join(SHARD_DIR, f"{stem}.shard-{index}-of-{count}.metrics.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                reports.append(json.load(f))
+    if reports:
+        report = dict(combine_reports(reports), profiles=reports[-1]["profiles"], shards=count)
+        with open(result_path(profile_key, ".metrics.json"), "w") as f:
+            json.dump(report, f, indent=2)
+    return writer.finish(header), writer.path
 
 
 # ─────────────────────────────────────────────
 # CORE RUNNER
 # ─────────────────────────────────────────────
+# Several profiles often search for the same terms and find the
+# same companies. run_profiles() shares the expensive work between
+# them: each search runs once, each place_id gets one Place Details
+# lookup and each website is crawled once. Only keyword matching
+# and the output files are per profile.
 
-def run_profile(profile_key):
-    profile = PROFILES[profile_key]
-    print(f"\n{'═' * 65}")
-    print(f"  PROFILE: {profile['name']}")
-    print(f"  Location: {LOCATION_LABEL} | Radius: {TOTAL_RADIUS_METERS // 1000}km ({round(TOTAL_RADIUS_METERS / 1609)}mi)")
-    print(f"  Search zones: {len(SEARCH_CENTERS)}")
-    print(f"{'═' * 65}")
+def discover_companies(profile_keys, journal, on_found=None, stop=None):
+    """
+    Search each unique term once across the planned cells.
+    Returns (all_companies, {profile_key: [place_id, ...]}, coverage),
+    with each profile's place_ids in the order its own terms found them
+    and `coverage` holding the per-term search report. `on_found` and
+    `stop` are passed on to search_term_adaptively.
+    """
+    terms = []
+    for key in profile_keys:
+        for term in PROFILES[key]["place_searches"]:
+            if term not in terms:
+                terms.append(term)
 
-    # Phase 1: Discover companies
     all_companies = {}
-    for center in SEARCH_CENTERS:
-        print(f"\n  📍 Zone: {center['label']}")
-        for search_term in profile["place_searches"]:
-            results = search_places(search_term, center["lat"], center["lng"])
-            new = sum(
-                1 for c in results
-                if c["place_id"] not in all_companies
-                and not all_companies.update({c["place_id"]: c})
+    term_places = {}
+    coverage = {}
+    for search_term in terms:
+        places, report = search_term_adaptively(search_term, all_companies, journal, on_found, stop)
+        term_places[search_term] = places
+        coverage[search_term] = report
+        splits = sum(1 for c in report["cells"] if c["split"])
+        unique = len({c["place_id"] for c in places})
+        print(f"     '{search_term}' → {report['calls']} cells ({report['billed']} billed), "
+              f"{unique} places, {report['new_places']} new ({splits} cells split)"
+              + (", stopped at MAX_SEARCHES_PER_TERM" if report["budget_reached"] else ""))
+
+    calls = sum(r["calls"] for r in coverage.values())
+    billed = sum(r["billed"] for r in coverage.values())
+    failed = sum(r["failed"] for r in coverage.values())
+    if calls:
+        print(f"\n  📍 {billed} billed searches, {calls - billed - failed} served from the search "
+              f"cache, {len(all_companies) / calls:.1f} new companies per cell")
+    if failed:
+        print(f"  ⚠️  {failed} searches failed; their areas are missing from this run "
+              f"and will be searched again by --resume or the next run")
+
+    profile_places = {}
+    for key in profile_keys:
+        ids = {}
+        for search_term in PROFILES[key]["place_searches"]:
+            for c in term_places[search_term]:
+                ids.setdefault(c["place_id"], None)
+        profile_places[key] = list(ids)
+
+    return all_companies, profile_places, coverage
+
+
+# The stages run side by side, connected by bounded queues:
+#
+#   discover ──▶ website lookups ──▶ career page checks ──▶ results
+#   (1 thread)   (PLACES_CONCURRENCY)  (CRAWL_CONCURRENCY)   (caller)
+#
+# A company found by the first search is already being looked up and
+# crawled while later searches are still running. When a queue is
+# full the stage feeding it waits, so a slow crawl holds back the
+# lookups and searches instead of piling up work in memory.
+#
+# Stage threads report to the caller's thread through an event queue;
+# only the caller's thread touches the result bookkeeping, the run
+# journal's site records and the output.
+
+_END = object()
+
+
+class Pipeline:
+    """
+    Streaming run of one or more profiles. Iterate over results() to
+    get (profile_key, bucket, company, order) as each company's website
+    is checked; afterwards all_companies, profile_places, coverage and
+    failed hold the run's totals. `sites`, if given, picks which
+    websites (by site_key) this run checks.
+    """
+
+    def __init__(self, profile_keys, journal, sites=None):
+        self.profile_keys = profile_keys
+        self.journal = journal
+        self.sites = sites
+        self.matcher = KeywordMatcher({key: PROFILES[key]["job_keywords"] for key in profile_keys})
+        self.all_companies = {}
+        self.profile_places = {}
+        self.coverage = {}
+        self.failed = []
+        self.cached_lookups = 0
+
+        # term → [(profile_key, index of the term in that profile)]
+        self._term_profiles = {}
+        for key in profile_keys:
+            for i, term in enumerate(PROFILES[key]["place_searches"]):
+                self._term_profiles.setdefault(term, []).append((key, i))
+
+        self._lookups = queue.Queue(PIPELINE_QUEUE_SIZE)
+        self._checks = queue.Queue(PIPELINE_QUEUE_SIZE)
+        self._events = queue.Queue(PIPELINE_QUEUE_SIZE)
+        self._sites_started = set()
+        self._deferred = []
+        self._lock = threading.Lock()
+        self._start = None
+        self._stop = threading.Event()
+        self._done = threading.Event()
+
+    # ── stage threads ──
+
+    def _emit(self, *event):
+        """
+        Hand an event to results(), waiting while a slow caller catches
+        up. Once the run is stopped nobody reads them, so it's dropped.
+        """
+        while not self._stop.is_set():
+            try:
+                self._events.put(event, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _run_stage(self, name, target, workers, then):
+        """Run `target` on `workers` threads; the last one to finish calls then()."""
+        remaining = [workers]
+
+        def worker():
+            _profile_worker_thread()
+            try:
+                target()
+            except Exception as e:
+                self._emit("error", e)
+            with self._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                METRICS.record_phase(name, time.perf_counter() - self._start)
+                then()
+
+        for _ in range(workers):
+            threading.Thread(target=worker, daemon=True).start()
+
+    def _discover(self):
+        def on_found(term, position, company, is_new):
+            self._emit("found", term, position, company)
+            if is_new:
+                self._lookups.put(company)
+
+        try:
+            self.all_companies, self.profile_places, self.coverage = discover_companies(
+                self.profile_keys, self.journal, on_found, self._stop
             )
-            if results:
-                print(f"     '{search_term}' → {len(results)} results, {new} new")
-            time.sleep(0.4)
-
-    print(f"\n  ✅ {len(all_companies)} unique companies found. Fetching websites...\n")
-
-    # Phase 2: Get websites
-    companies_with_sites = []
-    for place_id, company in all_companies.items():
-        website, phone = get_place_website(place_id)
-        if website:
-            company["website"] = website
-            company["phone"] = phone or ""
-            companies_with_sites.append(company)
-        time.sleep(0.15)
-
-    print(f"  {len(companies_with_sites)} companies have websites listed.")
-    print(f"  {'─' * 60}")
-
-    # Phase 3: Check career pages
-    results_with_jobs = []
-    results_careers_only = []
-    results_no_careers = []
-
-    for company in companies_with_sites:
-        print(f"  Checking: {company['name']}")
-        career_url = find_career_page(company["website"])
-
-        if not career_url:
-            results_no_careers.append(company)
-            print(f"    ❌ No career page")
-            time.sleep(0.4)
-            continue
+        finally:
+            for _ in range(max(1, PLACES_CONCURRENCY)):
+                self._lookups.put(_END)
+
+    def _lookup(self):
+        while True:
+            company = self._lookups.get()
+            if company is _END:
+                return
+            if self._stop.is_set():
+                continue  # Drain the queue so discovery can finish
+            try:
+                (website, phone), cached = place_details(company, self.journal)
+            except PlacesAPIError as e:
+                print(f"    ⚠️  Place Details failed: {e}")
+                self._emit("failed", company)
+                continue
+            if website:
+                company["website"] = website
+                company["phone"] = phone or ""
+            self._emit("details", company, cached)
+            if not website:
+                continue
+
+            site = site_key(website)
+            if self.sites and not self.sites(site):
+                continue  # Another shard's website
+            with self._lock:
+                if site in self._sites_started:
+                    continue
+                self._sites_started.add(site)
+            if site in self.journal.sites:
+                self._emit("site", site, None, *self.journal.sites[site])
+            elif HOST_HEALTH.known_bad(website):
+                with self._lock:
+                    self._deferred.append((site, website, company["name"]))
+            else:
+                self._checks.put((site, website, company["name"]))
+
+    def _check(self):
+        while True:
+            job = self._checks.get()
+            if job is _END:
+                return
+            if self._stop.is_set():
+                continue  # Drain the queue so the lookups can finish
+            site, website, name = job
+            try:
+                career_url, found = check_site(website, self.matcher)
+            except Exception:
+                career_url, found = None, {}
+            self._emit("site", site, name, career_url, found)
+
+    def _close_checks(self):
+        # Sites that were unreachable last run go last
+        for job in self._deferred:
+            self._checks.put(job)
+        for _ in range(max(1, CRAWL_CONCURRENCY)):
+            self._checks.put(_END)
+
+    def _crawl_done(self):
+        self._done.set()
+        self._emit("end")
+
+    # ── caller's thread ──
+
+    def stop(self, wait=True):
+        """
+        Stop a started run early: discovery ends before its next search,
+        the other stages finish the company or website in hand and skip
+        the rest. Events nobody will read are dropped, so stage threads
+        waiting for room in the event queue can finish. With wait=True,
+        returns once every stage thread is done.
+        """
+        self._stop.set()
+        while True:
+            try:
+                self._events.get_nowait()
+            except queue.Empty:
+                break
+        if wait and self._start is not None:
+            self._done.wait()
 
-        company["career_url"] = career_url
-        keywords_found = check_for_keywords(career_url, profile["job_keywords"])
+    def results(self):
+        """Generator of (profile_key, bucket, company, order)."""
+        self._start = time.perf_counter()
+        self._run_stage("crawl", self._check, max(1, CRAWL_CONCURRENCY), self._crawl_done)
+        self._run_stage("details", self._lookup, max(1, PLACES_CONCURRENCY), self._close_checks)
+        self._run_stage("discover", self._discover, 1, lambda: None)
 
-        if keywords_found:
-            company["keywords_found"] = keywords_found
-            results_with_jobs.append(company)
-            print(f"    🎯 MATCH: {', '.join(keywords_found)}")
-            print(f"       → {career_url}")
+        orders = {}          # place_id → {profile_key: order}
+        place_sites = {}     # place_id → site, once its website is known
+        companies_at = {}    # site → [company, ...]
+        site_results = {}    # site → (career_url, found)
+
+        def classify(company, site):
+            career_url, found = site_results[site]
+            for key, order in orders.get(company["place_id"], {}).items():
+                keywords_found = found.get(key, [])
+                if not career_url:
+                    yield key, "no_careers_page", dict(company), order
+                elif keywords_found:
+                    yield key, "keyword_matches", dict(
+                        company, career_url=career_url, keywords_found=keywords_found
+                    ), order
+                else:
+                    yield key, "has_careers_page", dict(company, career_url=career_url), order
+
+        while True:
+            event = self._events.get()
+            kind = event[0]
+            if kind == "end":
+                break
+            if kind == "error":
+                raise event[1]
+
+            if kind == "found":
+                _, term, position, company = event
+                place_orders = orders.setdefault(company["place_id"], {})
+                improved = False
+                for key, i in self._term_profiles.get(term, []):
+                    if key not in place_orders or (i, position) < place_orders[key]:
+                        place_orders[key] = (i, position)
+                        improved = True
+                site = place_sites.get(company["place_id"])
+                if improved and site in site_results:
+                    yield from classify(company, site)
+
+            elif kind == "details":
+                _, company, cached = event
+                self.cached_lookups += cached
+                if company["website"]:
+                    site = place_sites[company["place_id"]] = site_key(company["website"])
+                    companies_at.setdefault(site, []).append(company)
+                    if site in site_results:
+                        yield from classify(company, site)
+
+            elif kind == "failed":
+                self.failed.append(event[1])
+
+            elif kind == "site":
+                _, site, name, career_url, found = event
+                site_results[site] = (career_url, found)
+                if name is not None:  # Not replayed from the journal
+                    self.journal.record_site(site, career_url, found)
+                    print(site_progress(name, career_url, found, self.matcher))
+                for company in companies_at.get(site, []):
+                    yield from classify(company, site)
+
+
+def stream_results(profile_keys, resume=False):
+    """
+    Programmatic API: run profiles through the pipeline and yield
+    (profile_key, bucket, company) as each company's website is checked.
+    Nothing is written to results/. A company can be yielded again for
+    the same profile if a later search finds it at an earlier position.
+    Breaking out of the loop stops the searches, lookups and crawling.
+    """
+    journal = RunJournal(profile_keys, resume)
+    METRICS.reset()
+    pipeline = Pipeline(profile_keys, journal)
+    done = False
+    try:
+        for key, bucket, company, _order in pipeline.results():
+            yield key, bucket, company
+        done = True
+    except GeneratorExit:
+        done = True  # The caller stopped early; there is nothing to resume
+        raise
+    finally:
+        pipeline.stop()
+        if done:
+            journal.finish()
+        else:
+            journal.close()  # Kept for --resume
+
+
+def run_profiles(profile_keys, resume=False, output_format="json", shard=None):
+    """
+    Run one or more profiles through a shared pipeline. Returns {key: output}.
+    With resume=True, work recorded by an interrupted run is reused.
+    `output_format` is "json" or "jsonl" (see RESULT WRITERS).
+    `shard` is (index, count) to check only that slice (see SHARDING).
+    """
+    names = ", ".join(PROFILES[key]["name"] for key in profile_keys)
+    print(f"\n{'═' * 65}")
+    print(f"  PROFILE{'S' if len(profile_keys) > 1 else ''}: {names}")
+    print(f"  Location: {LOCATION_LABEL} | Radius: {TOTAL_RADIUS_METERS // 1000}km ({round(TOTAL_RADIUS_METERS / 1609)}mi)")
+    print(f"  Search area: {len(SEARCH_CELLS)} starting cells, split where busy")
+    print(f"{'═' * 65}\n")
+
+    plan = plan_path(profile_keys) if shard else None
+    if plan and os.path.exists(plan):
+        try:
+            check_plan(plan)
+        except ValueError as e:
+            print(f"  ❌ Can't use the plan: {e}")
+            sys.exit(1)
+
+    journal = RunJournal(profile_keys, resume, shard)
+    METRICS.reset()
+    writers = {key: RESULT_WRITERS[output_format](key, shard) for key in profile_keys}
+    sites = None
+    if shard:
+        index, count = shard
+        if os.path.exists(plan):
+            journal.load(plan)
+            print(f"  🧩 Shard {index} of {count}, using the searches and lookups in {plan} "
+                  f"(planned {journal.plan['run_date']})\n")
         else:
-            results_careers_only.append(company)
-            print(f"    📄 Has careers page (no keyword match)")
+            print(f"  🧩 Shard {index} of {count}. No plan in {SHARD_DIR}, so this shard "
+                  f"runs every search and lookup itself\n")
+        sites = lambda site: shard_of(site, count) == index
+
+    print(f"  Searching, looking up websites and checking career pages as companies "
+          f"are found ({CRAWL_CONCURRENCY} websites at a time)...\n")
+    pipeline = Pipeline(profile_keys, journal, sites)
+    try:
+        for key, bucket, company, order in pipeline.results():
+            writers[key].add(bucket, company, order)
+    except BaseException:
+        pipeline.stop(wait=False)  # Ctrl+C shouldn't wait for requests in flight
+        raise
+
+    all_companies = pipeline.all_companies
+    profile_places = pipeline.profile_places
+    coverage = pipeline.coverage
+    with_sites = [c for c in all_companies.values() if c["website"]]
+    print(f"\n  ✅ {len(all_companies)} unique companies found, {len(with_sites)} with websites listed "
+          f"({pipeline.cached_lookups} website lookups served from cache).")
+    if pipeline.failed:
+        print(f"  ⚠️  {len(pipeline.failed)} website lookups failed after retries:")
+        for c in pipeline.failed:
+            print(f"     {c['name']}")
+
+    run_date = datetime.now().strftime("%Y-%m-%d %H:%M")
+    outputs = {}
+    with METRICS.phase("write"):
+        for key in profile_keys:
+            companies = [all_companies[pid] for pid in profile_places[key]]
+            terms = PROFILES[key]["place_searches"]
+            header = {
+                "profile": PROFILES[key]["name"],
+                "location": LOCATION_LABEL,
+                "run_date": run_date,
+                "summary": {
+                    "total_companies": len(companies),
+                    "with_websites": sum(1 for c in companies if c["website"]),
+                },
+                "search_coverage": {
+                    "billed_searches": sum(coverage[t]["billed"] for t in terms),
+                    "terms": {t: coverage[t] for t in terms},
+                },
+            }
+            if shard:
+                header["shard"] = {"index": shard[0], "count": shard[1],
+                                   "plan": journal.plan and journal.plan["run_id"]}
+            outputs[key] = writers[key].finish(header)
+    for key in profile_keys:
+        print_profile_results(outputs[key])
+        print(f"\n  💾 Saved to {writers[key].path}")
+
+    # Phases cover every profile of the run, so each one gets the same report
+    report = dict(METRICS.report(), profiles=[PROFILES[key]["name"] for key in profile_keys])
+    for key in profile_keys:
+        path = result_path(key, ".metrics.json", shard)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+    phases = ", ".join(f"{name} {secs}s" for name, secs in report["phases_s"].items())
+    print(f"\n  ⏱️  {phases} | billed Places calls: "
+          f"{sum(report['billed_places_calls'].values())} | metrics in {path}")
+    journal.finish()
+    return outputs
+
+
+def plan_profiles(profile_keys, resume=False):
+    """
+    Run the searches and website lookups for one or more profiles, but
+    check no websites, and keep the journal as the plan for --shard runs.
+    """
+    print(f"\n{'═' * 65}")
+    print(f"  PLAN: {', '.join(PROFILES[key]['name'] for key in profile_keys)}")
+    print(f"{'═' * 65}\n")
+
+    journal = RunJournal(profile_keys, resume, plan=True)
+    if journal.plan is None:
+        journal.record_plan()
+    METRICS.reset()
+    pipeline = Pipeline(profile_keys, journal, sites=lambda site: False)
+    for _ in pipeline.results():
+        pass
+
+    with_sites = {site_key(c["website"]) for c in pipeline.all_companies.values() if c["website"]}
+    print(f"\n  ✅ {len(pipeline.all_companies)} unique companies found, "
+          f"{len(with_sites)} websites to check.")
+    if pipeline.failed:
+        print(f"  ⚠️  {len(pipeline.failed)} website lookups failed; each shard will retry them.")
+    report = dict(METRICS.report(), profiles=[PROFILES[key]["name"] for key in profile_keys])
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    with open(plan_path(profile_keys, ".metrics.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    path = plan_path(profile_keys)
+    journal.keep(path)
+    print(f"  💾 Plan saved to {path}. Now run each --shard I/N within "
+          f"{PLAN_MAX_AGE_HOURS} hours, then merge.\n")
 
-        time.sleep(0.8)
 
-    # Print summary
+def merge_profiles(profile_keys, output_format="json"):
+    """Merge the shard files of each profile. Returns {key: output}."""
+    plan_report = None
+    if os.path.exists(plan_path(profile_keys, ".metrics.json")):
+        with open(plan_path(profile_keys, ".metrics.json")) as f:
+            plan_report = json.load(f)
+    outputs = {}
+    for key in profile_keys:
+        try:
+            outputs[key], path = merge_shards(key, output_format, plan_report)
+        except ValueError as e:
+            print(f"\n  ❌ Can't merge {PROFILES[key]['name']}: {e}")
+            sys.exit(1)
+        print_profile_results(outputs[key])
+        print(f"\n  💾 Merged into {path}")
+    return outputs
+
+
+def print_profile_results(output):
     print(f"\n{'═' * 65}")
-    print(f"  RESULTS — {profile['name']}")
+    print(f"  RESULTS — {output['profile']}")
     print(f"{'═' * 65}")
 
-    if results_with_jobs:
-        print(f"\n  🎯 JOB KEYWORD MATCHES ({len(results_with_jobs)})\n")
-        for c in results_with_jobs:
+    if "keyword_matches" not in output:
+        # Streamed output: companies were printed as they were checked
+        summary = output["summary"]
+        print(f"\n  🎯 Keyword matches : {summary['keyword_matches']}")
+        print(f"  📄 Career pages    : {summary['has_careers_page']}")
+        print(f"  ❌ No career page  : {summary['no_careers_page']}")
+        return
+
+    if output["keyword_matches"]:
+        print(f"\n  🎯 JOB KEYWORD MATCHES ({len(output['keyword_matches'])})\n")
+        for c in output["keyword_matches"]:
             print(f"  Company  : {c['name']}")
             print(f"  Address  : {c.get('address', 'N/A')}")
             print(f"  Phone    : {c.get('phone', 'N/A')}")
@@ -301,46 +2899,25 @@ def run_profile(profile_key):
     else:
         print("\n  No keyword matches found at this time.")
 
-    if results_careers_only:
-        print(f"\n  📄 HAS CAREER PAGE — Worth Bookmarking ({len(results_careers_only)})\n")
-        for c in results_careers_only:
+    if output["has_careers_page"]:
+        print(f"\n  📄 HAS CAREER PAGE — Worth Bookmarking ({len(output['has_careers_page'])})\n")
+        for c in output["has_careers_page"]:
             print(f"  {c['name']:<42} {c['career_url']}")
 
-    print(f"\n  ❌ No career page: {len(results_no_careers)} companies")
+    print(f"\n  ❌ No career page: {len(output['no_careers_page'])} companies")
     print(f"     (Still worth a cold call or visit)\n")
-    for c in results_no_careers:
+    for c in output["no_careers_page"]:
         print(f"  {c['name']:<42} {c.get('phone', '')}  {c.get('website', '')}")
 
-    # Save results
-    output = {
-        "profile": profile["name"],
-        "location": LOCATION_LABEL,
-        "run_date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-        "summary": {
-            "total_companies": len(all_companies),
-            "with_websites": len(companies_with_sites),
-            "keyword_matches": len(results_with_jobs),
-            "has_careers_page": len(results_careers_only),
-            "no_careers_page": len(results_no_careers),
-        },
-        "keyword_matches": results_with_jobs,
-        "has_careers_page": results_careers_only,
-        "no_careers_page": results_no_careers,
-    }
-
-    os.makedirs("results", exist_ok=True)
-    filepath = os.path.join("results", profile["output_file"])
-    with open(filepath, "w") as f:
-        json.dump(output, f, indent=2)
-    print(f"\n  💾 Saved to {filepath}")
 
-    return output
+def run_profile(profile_key, resume=False, output_format="json", shard=None):
+    return run_profiles([profile_key], resume, output_format, shard)[profile_key]
 
 
-def run_all():
+def run_all(resume=False, output_format="json", shard=None):
+    outputs = run_profiles(list(PROFILES), resume, output_format, shard)
     all_summaries = []
-    for key in PROFILES:
-        result = run_profile(key)
+    for key, result in outputs.items():
         all_summaries.append({
             "profile": PROFILES[key]["name"],
             "summary": result["summary"],
@@ -383,34 +2960,100 @@ def show_menu():
 # ENTRY POINT
 # ─────────────────────────────────────────────
 
+def configure_cache(cache_dir, refresh=False):
+    """Point the caches at `cache_dir`, optionally ignoring cached answers."""
+    global CACHE_DIR, REFRESH_CACHE
+    CACHE_DIR = cache_dir
+    REFRESH_CACHE = refresh
+    _caches.clear()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Local Job Scraper")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["plan", "merge"],
+        help="plan: run the searches and website lookups once for --shard runs; "
+             "merge: combine the shard results into results/ (default: a normal run)",
+    )
     parser.add_argument(
         "--profile",
         help="Profile key to run, or 'all' (for GitHub Actions / non-interactive use)",
     )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached lookups and fetch everything fresh (cache is still updated)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=CACHE_DIR,
+        help=f"Where to keep the lookup cache between runs (default: {CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the last interrupted run of the same profile(s)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=sorted(RESULT_WRITERS),
+        default="json",
+        help="json: one file per profile at the end (default); "
+             "jsonl: one line per company, written as soon as it is checked",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="Check only slice I of N of the websites, e.g. 1/4 "
+             f"(after `plan`; results go to {SHARD_DIR} for `merge`)",
+    )
+    parser.add_argument(
+        "--profile-hotpaths",
+        action="store_true",
+        help="Profile the run with cProfile, print the hottest functions "
+             f"and save the full profile to {HOTPATHS_FILE}",
+    )
     args = parser.parse_args()
+    configure_cache(args.cache_dir, args.refresh)
+    if args.profile_hotpaths:
+        start_hotpath_profile()
+        try:
+            run_selected(args)
+        finally:
+            os.makedirs(os.path.dirname(HOTPATHS_FILE), exist_ok=True)
+            save_hotpath_profile(HOTPATHS_FILE)
+    else:
+        run_selected(args)
+
 
+def run_selected(args):
+    """Run the command for the profile(s) picked on the command line or from the menu."""
     if args.profile:
-        if args.profile == "all":
-            run_all()
-        elif args.profile in PROFILES:
-            run_profile(args.profile)
-        else:
+        choice = args.profile
+        if choice != "all" and choice not in PROFILES:
             print(f"\n  Unknown profile '{args.profile}'. Check config.py for valid keys.")
             sys.exit(1)
-        return
+    else:
+        # Interactive menu
+        choice = show_menu()
+        if choice == str(len(PROFILES) + 1):
+            choice = "all"
+        elif choice not in PROFILES:
+            print("\n  Invalid choice.")
+            sys.exit(1)
+    profile_keys = list(PROFILES) if choice == "all" else [choice]
 
-    # Interactive menu
-    choice = show_menu()
-    all_key = str(len(PROFILES) + 1)
-    if choice == all_key:
-        run_all()
-    elif choice in PROFILES:
-        run_profile(choice)
+    if args.command == "plan":
+        plan_profiles(profile_keys, args.resume)
+    elif args.command == "merge":
+        merge_profiles(profile_keys, args.format)
+    elif choice == "all":
+        run_all(args.resume, args.format, args.shard)
     else:
-        print("\n  Invalid choice.")
-        sys.exit(1)
+        run_profile(choice, args.resume, args.format, args.shard)
 
 
 if __name__ == "__main__":
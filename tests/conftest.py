@@ -0,0 +1,6 @@
+import os
+import sys
+
+# job_scraper exits at import time without an API key; tests never call Google
+os.environ.setdefault("GOOGLE_PLACES_API_KEY", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,204 @@
+"""Job-board detection and APIs, against benchmark.py's local stand-ins."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import benchmark
+import job_scraper
+
+BENCH_OPTS = {
+    "seed": 7, "sites": 200, "page_kb": 1, "latency_ms": 0,
+    "error_rate": 0, "places_429_rate": 0,
+}
+
+
+def serve(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+@pytest.fixture(autouse=True)
+def scraper(monkeypatch, tmp_path):
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1,localhost")
+    monkeypatch.setattr(job_scraper, "PARSE_PROCESSES", 1)
+    monkeypatch.setattr(job_scraper.HOST_THROTTLE, "delay", 0)
+    cache_dir, refresh = job_scraper.CACHE_DIR, job_scraper.REFRESH_CACHE
+    job_scraper.configure_cache(str(tmp_path / "cache"))
+    yield job_scraper
+    job_scraper.configure_cache(cache_dir, refresh)
+
+
+@pytest.fixture(scope="module")
+def stand_in():
+    world = benchmark.World(BENCH_OPTS)
+    stats = {}
+    server, base = serve(benchmark.make_handler(world, stats, threading.Lock()))
+    yield world, stats, base
+    server.shutdown()
+
+
+@pytest.fixture
+def ats_bases(monkeypatch, stand_in):
+    _world, _stats, base = stand_in
+    for ats, path in [
+        ("greenhouse", "greenhouse/v1"), ("lever", "lever/v0"), ("ashby", "ashby"),
+        ("smartrecruiters", "smartrecruiters/v1"), ("workday", "workday"),
+    ]:
+        monkeypatch.setitem(job_scraper.ATS_API_BASES, ats, f"{base}/ats/{path}")
+
+
+# ── ats_board_url ──
+
+@pytest.mark.parametrize("text, board", [
+    ("https://boards.greenhouse.io/acme", "https://boards.greenhouse.io/acme"),
+    ("https://job-boards.greenhouse.io/acme/jobs/4012", "https://boards.greenhouse.io/acme"),
+    ("https://boards.greenhouse.io/embed/job_board?for=acme", "https://boards.greenhouse.io/acme"),
+    ('<script src="https://boards.greenhouse.io/embed/job_board/js?for=acme"></script>',
+     "https://boards.greenhouse.io/acme"),
+    ("https://jobs.lever.co/acme-co/8d1e2f/apply", "https://jobs.lever.co/acme-co"),
+    ('<iframe src="https://jobs.ashbyhq.com/acme.io/embed"></iframe>', "https://jobs.ashbyhq.com/acme.io"),
+    ("https://careers.smartrecruiters.com/AcmeCorp", "https://jobs.smartrecruiters.com/AcmeCorp"),
+    ("https://jobs.smartrecruiters.com/AcmeCorp/7430", "https://jobs.smartrecruiters.com/AcmeCorp"),
+    ("https://acme.wd5.myworkdayjobs.com/en-US/External/job/Austin/Estimator_R1",
+     "https://acme.wd5.myworkdayjobs.com/External"),
+    ("https://acme.wd1.myworkdayjobs.com/Careers", "https://acme.wd1.myworkdayjobs.com/Careers"),
+])
+def test_board_url_for_each_pattern(text, board):
+    assert job_scraper.ats_board_url(text) == board
+
+
+@pytest.mark.parametrize("text", [
+    # Script and API paths that are not board names (ATS_NON_BOARDS)
+    '<script src="https://boards.greenhouse.io/embed/job_board/js"></script>',
+    "https://boards.greenhouse.io/embed",
+    "https://jobs.lever.co/v0",
+    "https://jobs.ashbyhq.com/api/non-user-graphql",
+    "https://acme.wd1.myworkdayjobs.com/wday/cxs/acme/External/jobs",
+    # No board at all
+    "https://example.com/careers",
+    "<p>Apply on our careers page</p>",
+])
+def test_non_boards_are_ignored(text):
+    assert job_scraper.ats_board_url(text) is None
+
+
+def test_first_real_board_after_an_excluded_match():
+    page = (
+        '<script src="https://boards.greenhouse.io/embed/job_board/js"></script>'
+        '<a href="https://boards.greenhouse.io/embed/job_board?for=acme">Jobs</a>'
+    )
+    assert job_scraper.ats_board_url(page) == "https://boards.greenhouse.io/acme"
+
+
+# ── ats_job_titles ──
+
+def board_for(world, ats):
+    """A synthetic board of this ATS with at least one opening."""
+    for place in world.places:
+        token = f"site{place['index']}"
+        if place["layout"] == ats and world.board_titles(ats, token):
+            return token, world.board_titles(ats, token)
+    pytest.skip(f"no {ats} board in the synthetic world")
+
+
+@pytest.mark.parametrize("ats, url", [
+    ("greenhouse", "https://boards.greenhouse.io/{}"),
+    ("lever", "https://jobs.lever.co/{}"),
+    ("ashby", "https://jobs.ashbyhq.com/{}"),
+    ("smartrecruiters", "https://jobs.smartrecruiters.com/{}"),
+    ("workday", "https://{}.wd1.myworkdayjobs.com/External"),
+])
+def test_job_titles_for_each_ats(stand_in, ats_bases, ats, url):
+    world, _stats, _base = stand_in
+    token, titles = board_for(world, ats)
+    assert job_scraper.ats_job_titles(url.format(token)) == titles
+
+
+def test_workday_pages_through_every_opening(stand_in, ats_bases, monkeypatch):
+    world, stats, _base = stand_in
+    token, titles = max(
+        ((f"site{p['index']}", world.board_titles("workday", f"site{p['index']}"))
+         for p in world.places if p["layout"] == "workday"),
+        key=lambda board: len(board[1]),
+    )
+    assert len(titles) >= 3
+    monkeypatch.setattr(job_scraper, "WORKDAY_PAGE_SIZE", 2)
+    before = stats.get("ats_api", 0)
+    board = f"https://{token}.wd1.myworkdayjobs.com/External"
+    assert job_scraper.ats_job_titles(board) == titles
+    assert stats["ats_api"] - before == -(-len(titles) // 2)  # One request per page
+
+
+def test_unknown_board_raises(ats_bases):
+    with pytest.raises(Exception):
+        job_scraper.ats_job_titles("https://boards.greenhouse.io/no-such-board")
+
+
+# ── check_site fallback ──
+
+CAREERS_PAGE = (
+    "<html><body><h1>Careers</h1><p>Now hiring: Estimator</p>"
+    '<div id="grnhse_app"></div>'
+    '<script src="https://boards.greenhouse.io/embed/job_board/js?for=acme"></script>'
+    "</body></html>"
+)
+
+
+@pytest.fixture
+def company_site(monkeypatch):
+    """A website whose careers page embeds a Greenhouse board; board_status sets the API's answer."""
+    state = {"board_status": 200}
+
+    class Site(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.startswith("/gh/boards/acme/jobs"):
+                status = state["board_status"]
+                body = json.dumps({"jobs": [{"title": "Project Manager"}]} if status == 200 else {})
+                content_type = "application/json"
+            elif self.path == "/":
+                status, body, content_type = 200, '<a href="/careers">Careers</a>', "text/html"
+            elif self.path == "/careers":
+                status, body, content_type = 200, CAREERS_PAGE, "text/html"
+            else:
+                status, body, content_type = 404, "", "text/html"
+            data = body.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server, base = serve(Site)
+    monkeypatch.setitem(job_scraper.ATS_API_BASES, "greenhouse", f"{base}/gh")
+    yield state, base
+    server.shutdown()
+
+
+MATCHER_KEYWORDS = {"1": ["estimator", "project manager"]}
+
+
+def test_check_site_reads_the_board(company_site):
+    _state, base = company_site
+    matcher = job_scraper.KeywordMatcher(MATCHER_KEYWORDS)
+    career_url, found = job_scraper.check_site(base + "/", matcher)
+    assert career_url == "https://boards.greenhouse.io/acme"
+    assert found == {"1": ["project manager"]}
+
+
+@pytest.mark.parametrize("status", [404, 500])
+def test_check_site_falls_back_to_the_page_when_the_board_fails(company_site, status):
+    state, base = company_site
+    state["board_status"] = status
+    matcher = job_scraper.KeywordMatcher(MATCHER_KEYWORDS)
+    career_url, found = job_scraper.check_site(base + "/", matcher)
+    assert career_url == base + "/careers"
+    assert found == {"1": ["estimator"]}
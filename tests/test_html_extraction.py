@@ -0,0 +1,77 @@
+"""The streaming PageScanner ("fast") must read pages like BeautifulSoup ("bs4")."""
+
+import pytest
+
+import job_scraper
+
+PAGE_URL = "https://example.com/about/"
+
+PAGES = {
+    "malformed": (
+        "<html><body><div><p>Unclosed <b>bold <i>italic</p>"
+        "<a href='/team'>Team<a href=\"careers\">Join us</a>"
+        "<table><tr><td>Estimator<td>Project Manager</table>"
+        "<p>Trailing <span>text"
+    ),
+    "entities": (
+        "<p>Sales &amp; Marketing &mdash; Account&nbsp;Manager &#8211; &#x41;pply</p>"
+        "<a href='/jobs?dept=sales&amp;page=1'>Openings &gt; Sales</a>"
+        "<p>AT&T &copy 2024 caf&eacute; &lt;b&gt;not a tag&lt;/b&gt;</p>"
+    ),
+    "cdata_and_comments": (
+        "<p>Before</p><!-- <a href='/careers'>hidden</a> Estimator -->"
+        "<![CDATA[ raw <b>cdata</b> text ]]>"
+        "<p>After</p><a href='/jobs'>Jobs</a><!--unterminated"
+    ),
+    "script_style_template": (
+        "<head><style>.careers { color: red } a[href='/careers']{}</style>"
+        "<script>var html = '<a href=\"/script-careers\">Careers</a> Estimator';</script></head>"
+        "<body><template><a href='/template-jobs'>Jobs</a> Superintendent</template>"
+        "<p>Visible Project Manager</p>"
+        "<script type='application/ld+json'>{\"title\": \"Estimator\"}</script>"
+        "<a href='/careers/'>Careers</a></body>"
+    ),
+    "early_stop": (
+        "<nav><a href='/'>Home</a><a href='/join-our-team'>Join Our Team</a></nav>"
+        "<main>" + "<p>filler paragraph</p>" * 5000 + "<a href='/careers'>Careers</a>"
+        "<div><p>unclosed <b>tags <a href='/jobs'>Jobs</main>"
+    ),
+    "no_links": "<html><body><p>We are a family-owned roofing company.</p></body></html>",
+}
+
+
+def read(monkeypatch, parser, html):
+    monkeypatch.setattr(job_scraper, "HTML_PARSER", parser)
+    return job_scraper.career_link(html, PAGE_URL), job_scraper.page_text(html)
+
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_fast_scanner_matches_bs4(monkeypatch, name):
+    fast_link, fast_text = read(monkeypatch, "fast", PAGES[name])
+    bs4_link, bs4_text = read(monkeypatch, "bs4", PAGES[name])
+    assert fast_link == bs4_link
+    assert fast_text.split() == bs4_text.split()
+
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_chunked_page_matches_whole_page(monkeypatch, name):
+    # Downloads arrive in pieces that can split tags and entities
+    monkeypatch.setattr(job_scraper, "HTML_PARSER", "fast")
+    html = PAGES[name]
+    chunks = [html[i:i + 7] for i in range(0, len(html), 7)]
+    assert job_scraper.career_link(iter(chunks), PAGE_URL) == job_scraper.career_link(html, PAGE_URL)
+    assert job_scraper.page_text(iter(chunks)) == job_scraper.page_text(html)
+
+
+def test_early_stop_returns_first_career_link(monkeypatch):
+    for parser in ("fast", "bs4"):
+        link, _ = read(monkeypatch, parser, PAGES["early_stop"])
+        assert link == "https://example.com/join-our-team"
+
+
+def test_script_style_template_text_is_hidden(monkeypatch):
+    for parser in ("fast", "bs4"):
+        _, text = read(monkeypatch, parser, PAGES["script_style_template"])
+        assert "visible project manager" in text
+        assert "estimator" not in text
+        assert "superintendent" not in text
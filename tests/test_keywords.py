@@ -0,0 +1,57 @@
+"""Whole-word keyword matching across profiles."""
+
+import pytest
+
+import job_scraper
+
+
+def find(keywords, text):
+    return job_scraper.KeywordMatcher({"1": keywords}).find(text)
+
+
+@pytest.mark.parametrize("text", [
+    "We are hiring a presales manager",
+    "Regional sales managers wanted",
+    "salesmanager",
+])
+def test_keyword_inside_a_longer_word_is_not_found(text):
+    assert find(["sales manager"], text) == set()
+
+
+@pytest.mark.parametrize("text", [
+    "Sales Manager",
+    "Now hiring: sales manager (remote)",
+    "sales\n   manager",
+    "Open role - Sales Manager.",
+])
+def test_keyword_found_as_whole_words(text):
+    assert find(["sales manager"], text) == {"sales manager"}
+
+
+def test_overlapping_keywords_are_all_found():
+    keywords = ["outside sales", "outside sales representative", "sales representative"]
+    assert find(keywords, "Outside Sales Representative, Dallas") == set(keywords)
+
+
+def test_plural_only_matches_the_plural_keyword():
+    keywords = ["outside sales", "outside sales representative", "outside sales representatives"]
+    assert find(keywords, "We need outside sales representatives") == {
+        "outside sales", "outside sales representatives",
+    }
+
+
+def test_rejected_occurrence_does_not_hide_a_later_one():
+    assert find(["sales manager"], "presales manager and sales manager") == {"sales manager"}
+
+
+def test_split_keeps_each_profiles_keywords_in_config_order():
+    matcher = job_scraper.KeywordMatcher({
+        "1": ["Account Executive", "sales manager"],
+        "2": ["field engineer", "Sales  Manager"],
+    })
+    found = matcher.find("Sales manager and account executive roles")
+    assert matcher.split(found) == {
+        "1": ["Account Executive", "sales manager"],
+        "2": ["Sales  Manager"],
+    }
+    assert not matcher.all_found(found)